@@ -0,0 +1,660 @@
+#!/usr/bin/env python3
+"""HIIT56 — seeded local Postgres benchmark for the RLS-guarded queries.
+
+Why:
+- PERFORMANCE_SCALE_PLAN.md sets P95 < 300 ms for entitlement checks and
+  "no RLS policy timeouts", but nothing measured the policies. Every read of
+  `subscriptions`, `tenant_users` and `tenants` goes through
+  `is_platform_admin()` / `is_tenant_admin()`, and a missing index or a policy
+  evaluated once per row only shows up at a few million rows.
+- This loads supabase_schema.sql + supabase/migrations into a throwaway local
+  Postgres, seeds it with COPY, replays the plan's k6 scenarios as concurrent
+  queries through a fixed-size connection pool under a simulated `auth.uid()`,
+  and reports P50/P95/P99 per scenario plus the `EXPLAIN ANALYZE` plan of each
+  statement. Large sequential scans are listed next to the numbers.
+
+What it stubs (Supabase manages these, a plain Postgres doesn't have them):
+- `auth.users`, `auth.uid()` / `auth.role()` reading `request.jwt.claim.*`
+  (the same GUCs the RLS gate scripts in supabase/gates set), the `anon`,
+  `authenticated` and `service_role` roles and `storage.buckets/objects`.
+- supabase/migrations also holds copies of the audit / RLS test gates; those
+  are run by tools/run_db_gates.sh, not applied here.
+
+Each request runs the way PostgREST runs it: one transaction that sets the JWT
+claims, switches to the `authenticated` role and executes the statements. The
+transaction is rolled back, so the admin write scenario leaves the data as
+seeded. Latency includes the wait for a pooled connection.
+
+Public browsing is served from the CDN-cached JSON manifests and never hits
+Postgres, so it has no scenario here.
+
+Usage:
+  createdb hiit56_bench
+  python tools/bench_rls.py --dsn postgresql:///hiit56_bench --reset --users 1000000 --tenants 20000
+  python tools/bench_rls.py --dsn postgresql:///hiit56_bench --plan-indexes --out bench_rls.json
+
+`--reset` drops the public, auth and storage schemas. Only point this at a
+local database you own; Supabase hosts are refused.
+
+Requires psycopg 3:  pip install "psycopg[binary]"
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from library import ROOT
+from pg import INSTALL_HINT, connect, load_psycopg
+
+
+SCHEMA = "hiit56.bench_rls.v1"
+SCHEMA_SQL = ROOT / "supabase_schema.sql"
+MIGRATIONS = ROOT / "supabase" / "migrations"
+# gate scripts that live next to the migrations; see tools/run_db_gates.sh
+NOT_MIGRATIONS = re.compile(r"AntiDrift_Audit|RLS_Tests")
+
+# PERFORMANCE_SCALE_PLAN.md acceptance: "P95 < 300ms for simple entitlement check endpoints"
+ENTITLEMENT_P95_MS = 300.0
+STATEMENT_TIMEOUT_MS = 5000
+STAFF_PER_TENANT = 4
+PLATFORM_ADMINS = 5
+# sequential scans that touch fewer rows than this are not worth reporting
+SEQ_SCAN_REPORT_ROWS = 1000
+
+# "Add indexes:" from PERFORMANCE_SCALE_PLAN.md. Created by --plan-indexes so a
+# run with and without them shows what they buy.
+PLAN_INDEXES = (
+    "create index if not exists subscriptions_subject_idx on public.subscriptions (subject_type, subject_id)",
+    "create index if not exists tenant_users_tenant_user_idx on public.tenant_users (tenant_id, user_id)",
+    "create index if not exists tenants_slug_idx on public.tenants (slug)",
+)
+
+SUPABASE_HOST_RE = re.compile(r"\.supabase\.(co|com|net)\b|pooler\.supabase", re.I)
+
+
+AUTH_STUB_SQL = """
+create extension if not exists "uuid-ossp";
+create extension if not exists "pgcrypto";
+
+create schema if not exists auth;
+
+create table if not exists auth.users (
+  id uuid primary key,
+  email text,
+  created_at timestamptz not null default now()
+);
+
+create or replace function auth.uid()
+returns uuid
+language sql stable
+as $$
+  select coalesce(
+    nullif(current_setting('request.jwt.claim.sub', true), ''),
+    (nullif(current_setting('request.jwt.claims', true), '')::jsonb ->> 'sub')
+  )::uuid
+$$;
+
+create or replace function auth.role()
+returns text
+language sql stable
+as $$
+  select coalesce(
+    nullif(current_setting('request.jwt.claim.role', true), ''),
+    (nullif(current_setting('request.jwt.claims', true), '')::jsonb ->> 'role')
+  )::text
+$$;
+
+do $$
+begin
+  if not exists (select 1 from pg_roles where rolname = 'anon') then
+    create role anon nologin noinherit;
+  end if;
+  if not exists (select 1 from pg_roles where rolname = 'authenticated') then
+    create role authenticated nologin noinherit;
+  end if;
+  if not exists (select 1 from pg_roles where rolname = 'service_role') then
+    create role service_role nologin noinherit bypassrls;
+  end if;
+end $$;
+
+create schema if not exists storage;
+
+create table if not exists storage.buckets (
+  id text primary key,
+  name text not null,
+  public boolean not null default false,
+  created_at timestamptz not null default now()
+);
+
+create table if not exists storage.objects (
+  id uuid primary key default gen_random_uuid(),
+  bucket_id text references storage.buckets(id),
+  name text,
+  owner uuid,
+  metadata jsonb,
+  created_at timestamptz not null default now()
+);
+
+alter table storage.objects enable row level security;
+"""
+
+# What Supabase's default privileges hand the API roles; RLS does the rest.
+GRANTS_SQL = """
+grant usage on schema public, auth, storage to anon, authenticated, service_role;
+grant select, insert, update, delete on all tables in schema public, storage to anon, authenticated, service_role;
+grant usage, select on all sequences in schema public to anon, authenticated, service_role;
+grant execute on all functions in schema public, auth to anon, authenticated, service_role;
+grant anon, authenticated, service_role to current_user;
+"""
+
+RESET_SQL = """
+drop schema if exists public, auth, storage cascade;
+create schema public;
+grant all on schema public to public;
+"""
+
+
+_print_lock = threading.Lock()
+
+
+def _log(msg: str) -> None:
+    with _print_lock:
+        sys.stdout.write(msg + "\n")
+        sys.stdout.flush()
+
+
+# -- identities ---------------------------------------------------------------
+
+# Seeded ids are a bijection of (namespace, index), so any worker can derive the
+# id of user i or tenant j without the seed having to be kept in memory.
+_MIX = 0x9E3779B97F4A7C15F39CC0605CEDC835
+_MASK = (1 << 128) - 1
+_USER, _TENANT = 1, 2
+
+
+def _uuid(ns: int, i: int) -> uuid.UUID:
+    x = ((ns << 64 | i) * _MIX) & _MASK
+    x = ((x ^ (x >> 67)) * _MIX) & _MASK  # spread the bits so ids don't share prefixes
+    return uuid.UUID(int=x, version=4)
+
+
+def user_id(i: int) -> uuid.UUID:
+    return _uuid(_USER, i)
+
+
+def tenant_id(j: int) -> uuid.UUID:
+    return _uuid(_TENANT, j)
+
+
+def tenant_admin_index(j: int, users: int) -> int:
+    """User index of tenant j's admin; its staff are the next STAFF_PER_TENANT users."""
+    return (j * (STAFF_PER_TENANT + 1)) % users
+
+
+def platform_admin_index(k: int, users: int) -> int:
+    return users - 1 - k
+
+
+# -- schema + seed ------------------------------------------------------------
+
+
+def _cp_order(path: Path) -> Tuple[int, str]:
+    m = re.search(r"CP(\d+)", path.name)
+    return (int(m.group(1)) if m else 0, path.name)
+
+
+def migration_files(root: Path = MIGRATIONS) -> List[Path]:
+    """Migrations in checkpoint order (CP27 before CP33), gate scripts left out."""
+    files = [p for p in root.glob("*.sql") if not NOT_MIGRATIONS.search(p.name)]
+    return sorted(files, key=_cp_order)
+
+
+def schema_present(conn: Any) -> bool:
+    return conn.execute("select to_regclass('public.subscriptions') is not null").fetchone()[0]
+
+
+def apply_schema(conn: Any) -> None:
+    # no parameters -> simple query protocol, so whole files go in one execute
+    # CP27's is_blocked_between() (language sql) reads public.blocks before the
+    # file creates it; load bodies unchecked, as pg_dump output does
+    conn.execute("set check_function_bodies = off")
+    conn.execute(AUTH_STUB_SQL)
+    for path in [SCHEMA_SQL] + migration_files():
+        t0 = time.perf_counter()
+        conn.execute(path.read_text(encoding="utf-8"))
+        _log(f"applied {path.relative_to(ROOT)} in {(time.perf_counter() - t0) * 1000:.0f} ms")
+    conn.execute(GRANTS_SQL)
+    conn.execute("reset check_function_bodies")
+
+
+def _copy(conn: Any, table: str, columns: Sequence[str], rows: Iterator[Tuple[Any, ...]]) -> int:
+    t0 = time.perf_counter()
+    n = 0
+    with conn.cursor() as cur:
+        with cur.copy(f"copy {table} ({', '.join(columns)}) from stdin") as cp:
+            for row in rows:
+                cp.write_row(row)
+                n += 1
+    dt = time.perf_counter() - t0
+    _log(f"seeded {table}: {n:,} rows in {dt:.1f}s ({n / max(dt, 1e-9):,.0f} rows/s)")
+    return n
+
+
+def seed(conn: Any, users: int, tenants: int) -> None:
+    """Bulk-load a deterministic data set: members, tenants with staff, subscriptions, comps."""
+    if users <= STAFF_PER_TENANT + PLATFORM_ADMINS:
+        raise ValueError(f"--users must be larger than {STAFF_PER_TENANT + PLATFORM_ADMINS}")
+    now = datetime.now(timezone.utc)
+    statuses = ("active", "active", "active", "trialing", "past_due", "canceled")
+
+    def member_subs() -> Iterator[Tuple[Any, ...]]:
+        for i in range(users):
+            if i % 10 >= 6:
+                continue  # 60% of users subscribe
+            uid = user_id(i)
+            yield ("user", uid, "member_annual" if i % 4 == 0 else "member_monthly", statuses[i % len(statuses)],
+                   f"cus_bench{i}", f"sub_bench{i}", now + timedelta(days=i % 30))
+            if i % 10 == 0:
+                # an older, canceled subscription: users carry history
+                yield ("user", uid, "member_monthly", "canceled", f"cus_bench{i}", f"sub_bench{i}_old", now - timedelta(days=60 + i % 300))
+        for j in range(tenants):
+            yield ("tenant", tenant_id(j), "biz_pro" if j % 3 == 0 else "biz_starter", statuses[j % len(statuses)],
+                   f"cus_benchbiz{j}", f"sub_benchbiz{j}", now + timedelta(days=j % 30))
+
+    def tenant_users() -> Iterator[Tuple[Any, ...]]:
+        for j in range(tenants):
+            tid, first = tenant_id(j), tenant_admin_index(j, users)
+            yield (tid, user_id(first), "admin")
+            for s in range(1, STAFF_PER_TENANT + 1):
+                yield (tid, user_id((first + s) % users), "staff")
+
+    with conn.transaction():
+        _copy(conn, "auth.users", ("id", "email"), ((user_id(i), f"u{i}@bench.local") for i in range(users)))
+        _copy(conn, "public.profiles", ("user_id", "email"), ((user_id(i), f"u{i}@bench.local") for i in range(users)))
+        _copy(conn, "public.platform_admins", ("user_id",),
+              ((user_id(platform_admin_index(k, users)),) for k in range(PLATFORM_ADMINS)))
+        _copy(conn, "public.tenants", ("id", "slug", "name"),
+              ((tenant_id(j), f"gym-{j}", f"Bench Gym {j}") for j in range(tenants)))
+        _copy(conn, "public.tenant_users", ("tenant_id", "user_id", "role"), tenant_users())
+        _copy(conn, "public.subscriptions",
+              ("subject_type", "subject_id", "tier", "status", "stripe_customer_id", "stripe_subscription_id", "current_period_end"),
+              member_subs())
+        _copy(conn, "public.entitlements", ("subject_type", "subject_id", "kind", "valid_until"),
+              (("user", user_id(i), "comp", now + timedelta(days=30)) for i in range(0, users, 100)))
+    conn.execute("analyze")
+
+
+def seeded_size(conn: Any) -> Tuple[int, int]:
+    users = conn.execute("select count(*) from auth.users").fetchone()[0]
+    tenants = conn.execute("select count(*) from public.tenants").fetchone()[0]
+    return int(users), int(tenants)
+
+
+# -- scenarios ----------------------------------------------------------------
+
+
+@dataclass
+class Scenario:
+    name: str
+    k6: str  # the PERFORMANCE_SCALE_PLAN.md scenario this stands in for
+    identity: str  # member | tenant_admin | platform_admin
+    statements: Sequence[str]
+    target_p95_ms: Optional[float] = None
+
+
+SCENARIOS: Sequence[Scenario] = (
+    Scenario(
+        "member_entitlement",
+        "Member browsing: entitlement check",
+        "member",
+        (
+            "select tier, status, current_period_end from public.subscriptions"
+            " where subject_type = 'user' and subject_id = %(uid)s and status in ('active', 'trialing')"
+            " order by current_period_end desc limit 1",
+            "select kind, value, valid_until from public.entitlements"
+            " where subject_type = 'user' and subject_id = %(uid)s and (valid_until is null or valid_until > now())",
+        ),
+        ENTITLEMENT_P95_MS,
+    ),
+    # what a client sends when it leaves the filtering to RLS (`.from('subscriptions').select()`)
+    Scenario(
+        "member_entitlement_rls_only",
+        "Member browsing: entitlement check, filter left to RLS",
+        "member",
+        (
+            "select tier, status, current_period_end from public.subscriptions"
+            " where status in ('active', 'trialing') order by current_period_end desc limit 1",
+            "select kind, value, valid_until from public.entitlements where valid_until is null or valid_until > now()",
+        ),
+        ENTITLEMENT_P95_MS,
+    ),
+    Scenario(
+        "business_tenant_users",
+        "Business: tenant users list",
+        "tenant_admin",
+        (
+            "select user_id, role, created_at from public.tenant_users where tenant_id = %(tid)s order by created_at",
+            "select tier, status, current_period_end from public.subscriptions"
+            " where subject_type = 'tenant' and subject_id = %(tid)s",
+        ),
+    ),
+    Scenario(
+        "admin_tenants_list",
+        "Admin: tenant directory",
+        "platform_admin",
+        ("select id, slug, name, status from public.tenants order by created_at desc limit 50",),
+    ),
+    Scenario(
+        "admin_entitlement_write",
+        "Admin: create coupon/entitlement",
+        "platform_admin",
+        (
+            "insert into public.entitlements (subject_type, subject_id, kind, value, created_by)"
+            " values ('user', %(subject)s, 'comp', '{\"source\": \"bench\"}', auth.uid()) returning id",
+        ),
+    ),
+)
+
+
+def identity(rng: random.Random, kind: str, users: int, tenants: int) -> Dict[str, str]:
+    """JWT subject plus the ids a scenario's statements refer to."""
+    j = rng.randrange(tenants)
+    if kind == "tenant_admin":
+        uid = user_id(tenant_admin_index(j, users))
+    elif kind == "platform_admin":
+        uid = user_id(platform_admin_index(rng.randrange(PLATFORM_ADMINS), users))
+    else:
+        uid = user_id(rng.randrange(users))
+    return {"uid": str(uid), "tid": str(tenant_id(j)), "subject": str(user_id(rng.randrange(users)))}
+
+
+class Pool:
+    """Fixed-size connection pool (PostgREST keeps a small pool; load queues behind it).
+
+    Waiters are served first come, first served: a released connection is
+    handed to the oldest waiter, so a worker that just released one can't take
+    it straight back and starve the others (queue.Queue allows that).
+    """
+
+    def __init__(self, dsn: str, size: int, opener: Callable[[str], Any] = connect) -> None:
+        self._lock = threading.Lock()
+        self._all = [opener(dsn) for _ in range(size)]
+        self._free: List[Any] = list(self._all)
+        self._waiters: Deque[Tuple[threading.Event, List[Any]]] = deque()
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        with self._lock:
+            if self._free and not self._waiters:
+                conn = self._free.pop()
+                waiter = None
+            else:
+                waiter = (threading.Event(), [])
+                self._waiters.append(waiter)
+        if waiter is not None:
+            waiter[0].wait()
+            conn = waiter[1][0]
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                if self._waiters:
+                    ready, slot = self._waiters.popleft()
+                    slot.append(conn)
+                    ready.set()
+                else:
+                    self._free.append(conn)
+
+    def close(self) -> None:
+        for conn in self._all:
+            conn.close()
+
+
+@contextmanager
+def as_user(conn: Any, uid: str, timeout_ms: int) -> Iterator[Any]:
+    """A rolled-back transaction running as `authenticated` with auth.uid() = uid."""
+    with conn.transaction(force_rollback=True):
+        conn.execute(
+            "select set_config('request.jwt.claim.sub', %(uid)s, true),"
+            " set_config('request.jwt.claim.role', 'authenticated', true),"
+            " set_config('statement_timeout', %(timeout)s, true)",
+            {"uid": uid, "timeout": str(timeout_ms)},
+        )
+        conn.execute("set local role authenticated")
+        yield conn
+
+
+def _percentile(sorted_ms: Sequence[float], q: float) -> Optional[float]:
+    if not sorted_ms:
+        return None
+    k = max(0, min(len(sorted_ms) - 1, math.ceil(q * len(sorted_ms)) - 1))  # nearest rank
+    return round(sorted_ms[k], 2)
+
+
+@dataclass
+class Result:
+    latencies_ms: List[float] = field(default_factory=list)
+    waits_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+    timeouts: int = 0
+    first_error: Optional[str] = None
+
+
+def run_scenario(pool: Pool, sc: Scenario, *, users: int, tenants: int, iterations: int,
+                 concurrency: int, timeout_ms: int, seed: int) -> Tuple[Result, float]:
+    psycopg = load_psycopg()
+    result = Result()
+    lock = threading.Lock()
+
+    def worker(w: int, n: int) -> None:
+        rng = random.Random(seed * 1_000_003 + w)
+        for _ in range(n):
+            params = identity(rng, sc.identity, users, tenants)
+            t0 = time.perf_counter()
+            try:
+                with pool.connection() as conn:
+                    t1 = time.perf_counter()
+                    with as_user(conn, params["uid"], timeout_ms):
+                        for sql in sc.statements:
+                            conn.execute(sql, params).fetchall()
+                ok, err = True, None
+            except psycopg.errors.QueryCanceled as ex:
+                ok, err, t1 = False, ex, t0
+                with lock:
+                    result.timeouts += 1
+            except psycopg.Error as ex:
+                ok, err, t1 = False, ex, t0
+            dt = (time.perf_counter() - t0) * 1000
+            with lock:
+                if ok:
+                    result.latencies_ms.append(dt)
+                    result.waits_ms.append((t1 - t0) * 1000)
+                else:
+                    result.errors += 1
+                    result.first_error = result.first_error or str(err).strip()
+
+    share = [iterations // concurrency + (1 if w < iterations % concurrency else 0) for w in range(concurrency)]
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        for fut in [ex.submit(worker, w, n) for w, n in enumerate(share) if n]:
+            fut.result()
+    return result, time.perf_counter() - t0
+
+
+def seq_scans(plan: Dict[str, Any]) -> List[str]:
+    """Sequential scans in a JSON plan that read more than SEQ_SCAN_REPORT_ROWS rows."""
+    out: List[str] = []
+
+    def walk(node: Dict[str, Any]) -> None:
+        if node.get("Node Type") == "Seq Scan":
+            kept = int(node.get("Actual Rows") or 0) * int(node.get("Actual Loops") or 1)
+            removed = int(node.get("Rows Removed by Filter") or 0) * int(node.get("Actual Loops") or 1)
+            if kept + removed >= SEQ_SCAN_REPORT_ROWS:
+                out.append(f"{node.get('Relation Name')}: Seq Scan read {kept + removed:,} rows, kept {kept:,}")
+        for child in node.get("Plans") or []:
+            walk(child)
+
+    walk(plan.get("Plan") or {})
+    return out
+
+
+def explain(conn: Any, sc: Scenario, params: Dict[str, str], timeout_ms: int) -> List[Dict[str, Any]]:
+    """`EXPLAIN (ANALYZE, BUFFERS)` of each statement, under the same identity as the load."""
+    psycopg = load_psycopg()
+    plans: List[Dict[str, Any]] = []
+    for sql in sc.statements:
+        try:
+            with as_user(conn, params["uid"], timeout_ms):
+                # client-side binding: EXPLAIN can't take server-side parameters
+                cur = psycopg.ClientCursor(conn)
+                plan = cur.execute("explain (analyze, buffers, format json) " + sql, params).fetchone()[0][0]
+        except psycopg.Error as ex:
+            plans.append({"statement": sql, "error": str(ex).strip()})
+            continue
+        plans.append({
+            "statement": sql,
+            "execution_ms": plan.get("Execution Time"),
+            "planning_ms": plan.get("Planning Time"),
+            "seq_scans": seq_scans(plan),
+            "plan": plan.get("Plan"),
+        })
+    return plans
+
+
+def summarize(sc: Scenario, res: Result, elapsed: float, plans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    lat = sorted(res.latencies_ms)
+    waits = sorted(res.waits_ms)
+    p95 = _percentile(lat, 0.95)
+    out: Dict[str, Any] = {
+        "k6": sc.k6,
+        "identity": sc.identity,
+        "requests": len(lat) + res.errors,
+        "errors": res.errors,
+        "timeouts": res.timeouts,
+        "rps": round(len(lat) / elapsed, 1) if elapsed > 0 else None,
+        "p50_ms": _percentile(lat, 0.50),
+        "p95_ms": p95,
+        "p99_ms": _percentile(lat, 0.99),
+        "max_ms": round(lat[-1], 2) if lat else None,
+        "pool_wait_p95_ms": _percentile(waits, 0.95),
+        "seq_scans": [s for p in plans for s in p.get("seq_scans") or []],
+        "plans": plans,
+    }
+    if res.first_error:
+        out["first_error"] = res.first_error
+    if sc.target_p95_ms is not None:
+        out["target_p95_ms"] = sc.target_p95_ms
+        out["pass"] = bool(lat) and p95 is not None and p95 < sc.target_p95_ms and not res.timeouts
+    return out
+
+
+def _fmt(v: Optional[float]) -> str:
+    return "-" if v is None else f"{v:.1f}"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Seed a local Postgres with the HIIT56 schema and benchmark the RLS-guarded queries")
+    ap.add_argument("--dsn", default=os.environ.get("BENCH_DATABASE_URL"), help="Local Postgres DSN (default: $BENCH_DATABASE_URL)")
+    ap.add_argument("--reset", action="store_true", help="Drop public/auth/storage, re-apply schema + migrations, re-seed")
+    ap.add_argument("--users", type=int, default=100_000, help="Users to seed (only when the database is empty)")
+    ap.add_argument("--tenants", type=int, default=2_000, help="Tenants to seed (only when the database is empty)")
+    ap.add_argument("--plan-indexes", action="store_true", help="Create the indexes PERFORMANCE_SCALE_PLAN.md recommends")
+    ap.add_argument("--scenario", action="append", choices=[s.name for s in SCENARIOS], help="Run only these (repeatable)")
+    ap.add_argument("--iterations", type=int, default=2000, help="Requests per scenario")
+    ap.add_argument("--concurrency", type=int, default=32, help="Concurrent virtual users")
+    ap.add_argument("--pool", type=int, default=10, help="Connection pool size")
+    ap.add_argument("--timeout-ms", type=int, default=STATEMENT_TIMEOUT_MS, help="statement_timeout per request")
+    ap.add_argument("--seed", type=int, default=56, help="RNG seed for identity selection")
+    ap.add_argument("--out", help="Write the JSON report here (default: stdout)")
+    args = ap.parse_args(argv)
+    # identity() draws a tenant (and a user) for every request
+    if args.tenants < 1 or args.users < 1:
+        ap.error("--tenants and --users must be at least 1")
+
+    if load_psycopg() is None:
+        print(f"ERROR: psycopg 3 is required: {INSTALL_HINT}", file=sys.stderr)
+        return 2
+    if not args.dsn:
+        ap.error("--dsn (or BENCH_DATABASE_URL) is required")
+    if SUPABASE_HOST_RE.search(args.dsn):
+        print("ERROR: refusing to run against a Supabase host; use a local database", file=sys.stderr)
+        return 2
+
+    with connect(args.dsn, autocommit=True) as conn:
+        if args.reset:
+            conn.execute(RESET_SQL)
+        if not schema_present(conn):
+            apply_schema(conn)
+        if args.plan_indexes:
+            for sql in PLAN_INDEXES:
+                conn.execute(sql)
+            conn.execute("analyze public.subscriptions, public.tenant_users, public.tenants")
+        users, tenants = seeded_size(conn)
+        if users == 0:
+            seed(conn, args.users, args.tenants)
+            users, tenants = seeded_size(conn)
+        elif args.users != ap.get_default("users") or args.tenants != ap.get_default("tenants"):
+            _log(f"database already seeded ({users:,} users, {tenants:,} tenants); --reset to re-seed")
+        server = conn.execute("show server_version").fetchone()[0]
+
+    report: Dict[str, Any] = {
+        "schema": SCHEMA,
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "server_version": server,
+        "users": users,
+        "tenants": tenants,
+        "plan_indexes": args.plan_indexes,
+        "concurrency": args.concurrency,
+        "pool": args.pool,
+        "iterations": args.iterations,
+        "scenarios": {},
+    }
+
+    selected = [s for s in SCENARIOS if not args.scenario or s.name in args.scenario]
+    pool = Pool(args.dsn, args.pool)
+    try:
+        for i, sc in enumerate(selected):
+            # warm the caches so the first requests don't skew P99
+            run_scenario(pool, sc, users=users, tenants=tenants, iterations=args.pool, concurrency=args.pool,
+                         timeout_ms=args.timeout_ms, seed=args.seed + 1000 + i)
+            res, elapsed = run_scenario(pool, sc, users=users, tenants=tenants, iterations=args.iterations,
+                                        concurrency=args.concurrency, timeout_ms=args.timeout_ms, seed=args.seed + i)
+            with pool.connection() as conn:
+                plans = explain(conn, sc, identity(random.Random(args.seed), sc.identity, users, tenants), args.timeout_ms)
+            s = report["scenarios"][sc.name] = summarize(sc, res, elapsed, plans)
+            verdict = "" if "pass" not in s else ("  PASS" if s["pass"] else f"  FAIL (target P95 < {sc.target_p95_ms:.0f} ms)")
+            _log(f"{sc.name:<30} p50 {_fmt(s['p50_ms']):>7}  p95 {_fmt(s['p95_ms']):>7}  p99 {_fmt(s['p99_ms']):>7} ms"
+                 f"  {s['rps'] or 0:>7.1f} req/s  errors {s['errors']}  timeouts {s['timeouts']}{verdict}")
+            for msg in s["seq_scans"]:
+                _log(f"  {msg}")
+    finally:
+        pool.close()
+
+    text = json.dumps(report, indent=2, default=str)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+        _log(f"Wrote: {args.out}")
+    else:
+        print(text)
+    failed = [name for name, s in report["scenarios"].items() if s.get("pass") is False or s["timeouts"]]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,279 @@
+"""HIIT56 — incremental build graph for the generated data artefacts.
+
+Why:
+- Nobody has to remember the ingest -> thumbnails -> timer demos -> QA order.
+- Each node declares the files it reads and writes. A node is rebuilt only
+  when the SHA-256 of its inputs and options (e.g. --fast) differs from its
+  last successful run (kept in .cache/build_state.json) or one of its
+  outputs is missing.
+- Nodes whose upstreams are finished run in parallel, all sharing one
+  `Library` so downstream nodes read upstream output from memory.
+
+Usage:
+  python tools/hiit56.py build            # rebuild stale nodes only
+  python tools/hiit56.py build --force    # rebuild everything
+  python tools/hiit56.py build --watch    # rebuild on every save of a source file
+
+Watch mode polls the graph's source files (inputs no node produces, e.g.
+`Workout Videos.csv` and the tool scripts that hold the
+rules) every WATCH_INTERVAL_SEC, so an edit is picked up well within a second
+without an inotify dependency.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from library import (
+    CATEGORIES, MANIFEST_FIELDS, MANIFEST_VERSIONS, ROOT, THUMBNAIL_OVERRIDES, TIMER_DEMOS, TIMER_EVENTS, VIDEOS_ALL,
+    VIDEOS_MOVES, Library,
+)
+
+
+TOOLS = ROOT / "tools"
+STATE_PATH = ROOT / ".cache" / "build_state.json"
+WATCH_INTERVAL_SEC = 0.25
+
+
+@dataclass
+class Node:
+    name: str
+    inputs: Sequence[Path]
+    outputs: Sequence[Path]
+    run: Callable[[], Optional[int]]
+    # options that change what `run` produces (e.g. "fast=1"); hashed with the inputs
+    params: str = ""
+    # returns a reason string when the node can't run in this environment
+    skip_reason: Callable[[], Optional[str]] = field(default=lambda: None)
+
+
+_print_lock = threading.Lock()
+
+
+def _log(msg: str) -> None:
+    # nodes log from worker threads; keep each line whole
+    with _print_lock:
+        sys.stdout.write(msg + "\n")
+        sys.stdout.flush()
+
+
+def _file_digest(path: Path) -> str:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return "missing"
+
+
+class BuildGraph:
+    def __init__(self, nodes: Sequence[Node], state_path: Path = STATE_PATH) -> None:
+        self.nodes: Dict[str, Node] = {n.name: n for n in nodes}
+        self.state_path = state_path
+        producer: Dict[Path, str] = {}
+        for n in nodes:
+            for out in n.outputs:
+                producer[out.resolve()] = n.name
+        self._producer = producer
+        self.deps: Dict[str, Set[str]] = {
+            n.name: {producer[p.resolve()] for p in n.inputs if p.resolve() in producer} - {n.name} for n in nodes
+        }
+        self._lock = threading.Lock()
+
+    def sources(self) -> List[Path]:
+        """Inputs that no node produces — the files a human edits."""
+        seen: Dict[Path, None] = {}
+        for n in self.nodes.values():
+            for p in n.inputs:
+                if p.resolve() not in self._producer:
+                    seen.setdefault(p, None)
+        return list(seen)
+
+    def digest(self, node: Node) -> str:
+        h = hashlib.sha256(f"{node.name}\0{node.params}".encode("utf-8"))
+        for p in sorted(node.inputs, key=lambda p: str(p)):
+            h.update(f"\0{p.resolve()}\0{_file_digest(p)}".encode("utf-8"))
+        return h.hexdigest()
+
+    def _load_state(self) -> Dict[str, str]:
+        try:
+            data = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _save_state(self, state: Dict[str, str]) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    def _build_one(self, node: Node, state: Dict[str, str], force: bool) -> int:
+        reason = node.skip_reason()
+        if reason:
+            _log(f"[{node.name}] skipped ({reason})")
+            return 0
+        digest = self.digest(node)
+        if not force and state.get(node.name) == digest and all(p.exists() for p in node.outputs):
+            _log(f"[{node.name}] up to date")
+            return 0
+        t0 = time.perf_counter()
+        _log(f"[{node.name}] building")
+        rc = node.run() or 0
+        _log(f"[{node.name}] {'ok' if rc == 0 else f'exit {rc}'} in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        if rc == 0:
+            with self._lock:
+                state[node.name] = digest
+                self._save_state(state)
+        return rc
+
+    def run(self, *, force: bool = False, jobs: int = 4) -> int:
+        """Build every stale node, upstreams first. Returns the first non-zero exit code."""
+        state = self._load_state()
+        pending = dict(self.nodes)
+        done: Set[str] = set()
+        failed: Set[str] = set()
+        first_rc = 0
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as ex:
+            running: Dict[Future, str] = {}
+            while pending or running:
+                for name in list(pending):
+                    deps = self.deps[name]
+                    if deps & failed:
+                        _log(f"[{name}] not built (upstream failed)")
+                        failed.add(name)
+                        del pending[name]
+                    elif deps <= done:
+                        running[ex.submit(self._build_one, pending.pop(name), state, force)] = name
+                if not running:
+                    if pending:
+                        raise ValueError(f"Dependency cycle between: {', '.join(sorted(pending))}")
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    name = running.pop(fut)
+                    try:
+                        rc = fut.result()
+                    except Exception as ex_:
+                        _log(f"[{name}] ERROR {ex_}")
+                        rc = 1
+                    if rc:
+                        failed.add(name)
+                        first_rc = first_rc or rc
+                    else:
+                        done.add(name)
+        return first_rc
+
+
+def _snapshot(paths: Sequence[Path]) -> Dict[Path, Tuple[int, int]]:
+    out: Dict[Path, Tuple[int, int]] = {}
+    for p in paths:
+        try:
+            st = p.stat()
+            out[p] = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            out[p] = (0, -1)
+    return out
+
+
+def watch(graph: BuildGraph, lib: Library, *, interval: float = WATCH_INTERVAL_SEC, **run_kw) -> int:
+    """Build once, then rebuild whenever a source file changes. Ctrl+C to stop."""
+    sources = graph.sources()
+    snap = _snapshot(sources)
+    graph.run(**run_kw)
+    _log(f"\nWatching {len(sources)} source files (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(interval)
+            now = _snapshot(sources)
+            changed = [p for p in sources if now[p] != snap[p]]
+            if not changed:
+                continue
+            snap = now
+            _log(f"\nChanged: {', '.join(p.name for p in changed)}")
+            for p in changed:
+                if p.resolve().parent == lib.data_dir.resolve():
+                    lib.invalidate(p.name)
+            graph.run(**run_kw)
+    except KeyboardInterrupt:
+        return 0
+
+
+def default_graph(lib: Library, csv_path: Path, *, fast: bool = False, state_path: Path = STATE_PATH) -> BuildGraph:
+    """The HIIT56 data pipeline: ingest -> (thumbs, timer-demos) -> qa."""
+    import qa_smoke
+
+    data = lib.path
+    ingest_outputs = [data(name) for name in MANIFEST_FIELDS] + [data(MANIFEST_VERSIONS), data(CATEGORIES)]
+
+    def ingest() -> int:
+        import ingest_videos
+
+        ingest_videos.ingest(csv_path, lib)
+        return 0
+
+    def thumbs() -> int:
+        import vimeo_thumbnail_pipeline
+
+        argv = ["--input", str(data(VIDEOS_ALL)), "--output", str(data(THUMBNAIL_OVERRIDES)), "--only-missing"]
+        return vimeo_thumbnail_pipeline.main(argv + (["--fast"] if fast else []), lib=lib)
+
+    def timer_demos() -> int:
+        import gen_timer_demos
+
+        return gen_timer_demos.main(lib)
+
+    def qa() -> int:
+        import qa_smoke
+
+        return qa_smoke.main(lib)
+
+    def no_token() -> Optional[str]:
+        token = os.environ.get("VIMEO_TOKEN") or os.environ.get("VIMEO_ACCESS_TOKEN")
+        return None if (token or "").strip() else "no VIMEO_TOKEN"
+
+    return BuildGraph(
+        [
+            Node(
+                "ingest",
+                inputs=[csv_path, TOOLS / "ingest_videos.py", TOOLS / "library.py", TOOLS / "manifest_delta.py"],
+                outputs=ingest_outputs,
+                run=ingest,
+            ),
+            Node(
+                "thumbs",
+                inputs=[data(VIDEOS_ALL), TOOLS / "vimeo_thumbnail_pipeline.py", TOOLS / "library.py"],
+                outputs=[data(THUMBNAIL_OVERRIDES)],
+                run=thumbs,
+                params=f"fast={int(fast)}",
+                skip_reason=no_token,
+            ),
+            Node(
+                "timer-demos",
+                inputs=[data(VIDEOS_MOVES), TOOLS / "gen_timer_demos.py", TOOLS / "timer_events.py", TOOLS / "library.py"],
+                outputs=[data(TIMER_DEMOS), data(TIMER_EVENTS)],
+                run=timer_demos,
+            ),
+            Node(
+                "qa",
+                # everything qa_smoke reads, so an edit to any of it re-runs QA
+                inputs=[
+                    *(data(p.name) for p in qa_smoke.REQUIRED_DATA), data(MANIFEST_VERSIONS),
+                    *qa_smoke.REQUIRED_PAGES, qa_smoke.BUILD_JSON,
+                    *sorted((qa_smoke.SITE / "assets" / "placeholders").glob("*")),
+                    ROOT / "site" / "assets" / "js" / "site.js", ROOT / "site" / "assets" / "css" / "styles.css",
+                    TOOLS / "qa_smoke.py", TOOLS / "library.py", TOOLS / "manifest_delta.py", TOOLS / "timer_events.py",
+                ],
+                outputs=[],
+                run=qa,
+            ),
+        ],
+        state_path=state_path,
+    )
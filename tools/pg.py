@@ -0,0 +1,38 @@
+"""HIIT56 — shared Postgres access for the local benchmark and replay tools.
+
+Why:
+- bench_rls.py and webhook_replay.py both talk to a local Postgres, but the
+  rest of the tools are stdlib only. psycopg is imported lazily here so that
+  importing either tool (or `hiit56 --help`) never needs it.
+
+Usage:
+  from pg import INSTALL_HINT, connect, load_psycopg
+
+  if load_psycopg() is None:
+      print("ERROR: psycopg 3 is required:", INSTALL_HINT)
+  with connect(dsn, autocommit=True) as conn:
+      ...
+"""
+
+from __future__ import annotations
+
+import functools
+from typing import Any
+
+
+INSTALL_HINT = 'pip install "psycopg[binary]"'
+
+
+@functools.lru_cache(maxsize=None)
+def load_psycopg() -> Any:
+    """The psycopg 3 module, or None if it isn't installed."""
+    try:
+        import psycopg as mod  # type: ignore
+    except Exception:
+        return None
+    return mod
+
+
+def connect(dsn: str, **kw: Any) -> Any:
+    # the migrations hold non-ASCII text; a SQL_ASCII database would default the client to ascii
+    return load_psycopg().connect(dsn, client_encoding="utf8", **kw)
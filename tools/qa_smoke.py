@@ -16,19 +16,86 @@ This is NOT a replacement for manual UX/browser QA on iPhone/Android/Desktop.
 
 from __future__ import annotations
 
+import contextlib
+import gzip
+import hashlib
+import hmac
+import io
 import json
+import math
 import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Set, Tuple
+from collections import Counter
+from typing import Any, List, Optional, Set, Tuple
+
+from library import (
+    CATEGORIES, MANIFEST_FIELDS, MANIFEST_VERSIONS, VIDEOS_ALL, VIDEOS_CLASSES, VIDEOS_MARKETING, VIDEOS_MOVES, Library,
+    unlisted_hash,
+)
+from manifest_delta import apply as apply_delta, make_delta, record_generation, verify_chain
+from timer_events import EventTable, check as check_events, compile_events
 
 
 ROOT = Path(__file__).resolve().parent.parent
 SITE = ROOT / "site"
 DATA = SITE / "assets" / "data"
+BUILD_JSON = SITE / "assets" / "build.json"
 
+REQUIRED_PAGES = [
+    SITE / "index.html",
+    SITE / "login.html",
+    SITE / "pricing.html",
+    SITE / "join.html",
+    SITE / "gym" / "join" / "index.html",
+    SITE / "app" / "book" / "class" / "index.html",
+    SITE / "biz" / "check-in" / "index.html",
+    SITE / "biz" / "migrate" / "index.html",
+    SITE / "biz" / "migrate" / "members" / "index.html",
+    SITE / "biz" / "migrate" / "schedule" / "index.html",
+    SITE / "biz" / "migrate" / "verify" / "index.html",
+    SITE / "biz" / "migrate" / "commit" / "index.html",
+    SITE / "biz" / "migrate" / "cutover" / "index.html",
+    SITE / "for-gyms" / "index.html",
+    SITE / "for-gyms" / "pricing.html",
+    SITE / "for-gyms" / "start.html",
+    SITE / "workouts" / "index.html",
+    SITE / "workouts" / "category.html",
+    SITE / "workouts" / "workout.html",
+    SITE / "app" / "index.html",
+    SITE / "app" / "workouts" / "index.html",
+    SITE / "app" / "workouts" / "category.html",
+    SITE / "app" / "workouts" / "workout.html",
+    SITE / "app" / "timer" / "index.html",
+    SITE / "app" / "timer" / "builder" / "index.html",
+    SITE / "app" / "timer" / "my-workouts" / "index.html",
+    SITE / "biz" / "index.html",
+    SITE / "biz" / "moves" / "index.html",
+    SITE / "biz" / "moves" / "move.html",
+    SITE / "biz" / "gym-timer" / "index.html",
+    SITE / "biz" / "gym-timer" / "builder" / "index.html",
+    SITE / "admin" / "index.html",
+    SITE / "admin" / "status" / "index.html",
+]
 
-def _load_json(path: Path) -> Any:
-    return json.loads(path.read_text(encoding="utf-8"))
+REQUIRED_DATA = [
+    DATA / "categories_v1.json",
+    DATA / "categories_draft.json",  # kept as an alias/compat file
+    DATA / "videos_classes.json",
+    DATA / "videos_moves.json",
+    DATA / "videos_all.json",
+    DATA / "videos_marketing.json",
+    DATA / "videos_category_samples.json",
+    DATA / "timer_demos.json",
+    DATA / "timer_events.json",
+    DATA / "stripe_public_test.json",
+]
 
 
 def assert_(cond: bool, msg: str) -> None:
@@ -36,12 +103,13 @@ def assert_(cond: bool, msg: str) -> None:
         raise AssertionError(msg)
 
 
-def main() -> int:
+def main(lib: Optional[Library] = None) -> int:
+    lib = lib or Library(DATA)
+
     # Auto-label from build.json (no stale checkpoint strings).
-    build_path = SITE / "assets" / "build.json"
     label = "CP??"
     try:
-        data = json.loads(build_path.read_text(encoding="utf-8"))
+        data = json.loads(BUILD_JSON.read_text(encoding="utf-8"))
         label = data.get("label") or f"CP{data.get('cp')}"
     except Exception:
         pass
@@ -49,76 +117,100 @@ def main() -> int:
     print(f"Root: {ROOT}")
     print(f"Site: {SITE}")
 
-    required_pages = [
-        SITE / "index.html",
-        SITE / "login.html",
-        SITE / "pricing.html",
-        SITE / "join.html",
-        SITE / "gym" / "join" / "index.html",
-        SITE / "app" / "book" / "class" / "index.html",
-        SITE / "biz" / "check-in" / "index.html",
-        SITE / "biz" / "migrate" / "index.html",
-        SITE / "biz" / "migrate" / "members" / "index.html",
-        SITE / "biz" / "migrate" / "schedule" / "index.html",
-        SITE / "biz" / "migrate" / "verify" / "index.html",
-        SITE / "biz" / "migrate" / "commit" / "index.html",
-        SITE / "biz" / "migrate" / "cutover" / "index.html",
-        SITE / "for-gyms" / "index.html",
-        SITE / "for-gyms" / "pricing.html",
-        SITE / "for-gyms" / "start.html",
-        SITE / "workouts" / "index.html",
-        SITE / "workouts" / "category.html",
-        SITE / "workouts" / "workout.html",
-        SITE / "app" / "index.html",
-        SITE / "app" / "workouts" / "index.html",
-        SITE / "app" / "workouts" / "category.html",
-        SITE / "app" / "workouts" / "workout.html",
-        SITE / "app" / "timer" / "index.html",
-        SITE / "app" / "timer" / "builder" / "index.html",
-        SITE / "app" / "timer" / "my-workouts" / "index.html",
-        SITE / "biz" / "index.html",
-        SITE / "biz" / "moves" / "index.html",
-        SITE / "biz" / "moves" / "move.html",
-        SITE / "biz" / "gym-timer" / "index.html",
-        SITE / "biz" / "gym-timer" / "builder" / "index.html",
-        SITE / "admin" / "index.html",
-        SITE / "admin" / "status" / "index.html",
-    ]
-
     print("\n[1] Page presence")
-    for p in required_pages:
+    for p in REQUIRED_PAGES:
         assert_(p.exists(), f"Missing page: {p}")
         print(f"  OK: {p.relative_to(ROOT)}")
 
     print("\n[2] Data manifest presence")
-    required_data = [
-        DATA / "categories_v1.json",
-        DATA / "categories_draft.json",  # kept as an alias/compat file
-        DATA / "videos_classes.json",
-        DATA / "videos_moves.json",
-        DATA / "videos_all.json",
-        DATA / "videos_marketing.json",
-        DATA / "videos_category_samples.json",
-        DATA / "timer_demos.json",
-        DATA / "stripe_public_test.json",
-    ]
-    for p in required_data:
+    for p in REQUIRED_DATA:
         assert_(p.exists(), f"Missing data: {p}")
         print(f"  OK: {p.relative_to(ROOT)}")
 
+    print("\n[2b] Manifest delta chain")
+    if lib.path(MANIFEST_VERSIONS).exists():
+        problems = verify_chain(lib)
+        assert_(not problems, "Manifest delta chain broken:\n  " + "\n  ".join(problems))
+        print("  OK")
+    else:
+        print("  SKIP: no manifest_versions.json yet")
+
+    print("\n[2c] Manifest delta round-trip")
+    base = [{"video_id": i, "title": f"v{i}"} for i in range(1, 7)]
+    cases = {
+        "add": base[:3] + [{"video_id": 10, "title": "new"}] + base[3:] + [{"video_id": 11, "title": "tail"}],
+        "remove": base[:2] + base[4:],
+        "change": [dict(r, title="edited") if r["video_id"] in (2, 5) else r for r in base],
+        "reorder": base[::-1],
+        "mixed": [{"video_id": 12, "title": "new"}, base[5], dict(base[0], title="edited"), base[3]],
+        "unkeyed": base + [{"title": "no id"}],
+    }
+    for case, new in cases.items():
+        delta = make_delta("qa.json", base, new, 1)
+        assert_(apply_delta(base, delta) == new, f"delta '{case}': base + delta != full")
+    with tempfile.TemporaryDirectory() as tmp:
+        # big enough that a one-row delta is worth writing
+        many = [{"video_id": i, "title": f"v{i}"} for i in range(1, 41)]
+        scratch = Library(Path(tmp))
+        stale = record_generation(scratch, "qa.json", many, many[1:])
+        assert_(stale is not None and stale.exists(), "one-row delta was not written")
+        cached = scratch.raw(MANIFEST_VERSIONS)
+        before = json.dumps(cached, sort_keys=True)
+        record_generation(scratch, "qa.json", None, many)
+        assert_(not stale.exists(), f"chain restart left {stale.name} behind")
+        assert_(json.dumps(cached, sort_keys=True) == before, "record_generation modified the cached manifest_versions payload")
+    print(f"  OK: {len(cases)} cases")
+
     print("\n[3] JSON parsing")
-    cats = _load_json(DATA / "categories_v1.json")
-    classes = _load_json(DATA / "videos_classes.json")
-    moves = _load_json(DATA / "videos_moves.json")
-    assert_("categories" in cats and isinstance(cats["categories"], list), "categories_v1.json missing categories[]")
-    assert_(isinstance(classes, list) and len(classes) > 0, "videos_classes.json empty")
-    assert_(isinstance(moves, list) and len(moves) > 0, "videos_moves.json empty")
-    print(f"  OK: categories={len(cats['categories'])}, classes={len(classes)}, moves={len(moves)}")
+    try:
+        categories = lib.categories
+        classes = lib.classes
+        moves = lib.moves
+    except ValueError as ex:
+        raise AssertionError(str(ex))
+    assert_(len(classes) > 0, "videos_classes.json empty")
+    assert_(len(moves) > 0, "videos_moves.json empty")
+    for name in (VIDEOS_CLASSES, VIDEOS_MOVES):
+        dropped = lib.skipped(name)
+        assert_(not dropped, f"{name}: rows without an integer video_id (index {dropped[:10]})")
+    first = classes[0]
+    assert_(lib.video(first.video_id) is first and first in lib.in_category(first.category_slug or ""),
+            "Library indexes disagree with videos_classes.json")
+    print(f"  OK: categories={len(categories)}, classes={len(classes)}, moves={len(moves)}")
+
+    print("\n[3a] Unlisted embeds keep their ?h= hash (CP17)")
+    no_hash: List[str] = []
+    n_unlisted = 0
+    for name in (VIDEOS_ALL, VIDEOS_CLASSES, VIDEOS_MOVES, VIDEOS_MARKETING):
+        for r in lib.records(name):
+            h = unlisted_hash(r.vimeo_link)
+            if h is None:
+                continue
+            n_unlisted += 1
+            if unlisted_hash(None, r.embed_url) != h:
+                no_hash.append(f"{name}:{r.video_id}")
+    for c in categories:
+        hero = c.get("hero") or {}
+        rec = lib.video(hero.get("video_id"))
+        h = unlisted_hash(rec.vimeo_link) if rec else None
+        if h and unlisted_hash(None, hero.get("embed_url")) != h:
+            no_hash.append(f"{c.get('slug')} hero:{hero.get('video_id')}")
+    assert_(not no_hash, f"{len(no_hash)} embed_url(s) missing the vimeo_link hash: {no_hash[:10]}")
+    print(f"  OK: {n_unlisted} unlisted embeds")
 
     print("\n[3b] Timer demos sanity")
-    demos = _load_json(DATA / "timer_demos.json")
-    assert_("demos" in demos and isinstance(demos["demos"], list) and len(demos["demos"]) > 0, "timer_demos.json missing demos[]")
-    for d in demos["demos"]:
+    try:
+        demos = lib.timer_demos
+    except ValueError as ex:
+        raise AssertionError(str(ex))
+    assert_(len(demos) > 0, "timer_demos.json missing demos[]")
+    try:
+        tables = lib.timer_events
+    except ValueError as ex:
+        raise AssertionError(str(ex))
+    assert_(set(tables) == {d.get("id") for d in demos}, "timer_events.json does not match the demos (run tools/gen_timer_demos.py)")
+    n_events = 0
+    for d in demos:
         demo_id = d.get("id") or "(missing id)"
         segs = d.get("segments") or []
         assert_(isinstance(segs, list) and len(segs) > 0, f"Demo {demo_id} has no segments")
@@ -131,15 +223,31 @@ def main() -> int:
         if d.get("mode") == "gym":
             st = d.get("stations") or []
             assert_(isinstance(st, list) and len(st) > 0, f"Demo {demo_id} (gym) missing stations[]")
-    print(f"  OK: demos={len(demos['demos'])}")
+        try:
+            table = EventTable.from_json(tables.get(demo_id))
+        except ValueError as ex:
+            raise AssertionError(f"Demo {demo_id} events: {ex} (run tools/gen_timer_demos.py)")
+        problems = check_events(segs, table)
+        assert_(not problems, f"Demo {demo_id} cue errors: {problems[:5]}")
+        assert_(table == compile_events(segs), f"Demo {demo_id} events table is stale (run tools/gen_timer_demos.py)")
+        n_events += len(table)
+    # check() must notice a cue that is missing, not just one that is wrong
+    segs = demos[0]["segments"]
+    full = compile_events(segs)
+    for cue in ("next_up", "halfway", "countdown", "complete"):
+        i = next(i for i, ev in enumerate(full) if ev.type == cue)
+        cols = [list(c) for c in (full.t_ms, full.type, full.segment, full.payload)]
+        for c in cols:
+            del c[i]
+        assert_(check_events(segs, EventTable(*cols)), f"check() does not notice a missing {cue} event")
+    print(f"  OK: demos={len(demos)} cue_events={n_events}")
 
     print("\n[4] Category slugs + posters")
-    slug_set: Set[str] = set()
+    slug_set = lib.category_slugs
     teaser_set: Set[int] = set()
-    for c in cats["categories"]:
+    for c in categories:
         slug = c.get("slug")
         assert_(isinstance(slug, str) and slug, "Category missing slug")
-        slug_set.add(slug)
         poster = c.get("hero_poster")
         assert_(isinstance(poster, str) and poster.startswith("/"), f"Category {slug} missing hero_poster")
         poster_path = SITE / poster.lstrip("/")
@@ -152,16 +260,33 @@ def main() -> int:
     print(f"  OK: {len(slug_set)} categories, {len(teaser_set)} total teaser IDs")
 
     print("\n[5] Classes reference known category slugs")
-    bad = [v for v in classes if v.get("category_slug") not in slug_set]
+    bad = [v for v in classes if v.category_slug not in slug_set]
     assert_(len(bad) == 0, f"{len(bad)} class videos reference unknown category_slug")
     print("  OK")
 
     print("\n[6] Teaser IDs exist in class list")
-    class_ids: Set[int] = set(int(v.get("video_id")) for v in classes if v.get("video_id") is not None)
+    class_ids = lib.class_ids
     missing_teasers = sorted([tid for tid in teaser_set if tid not in class_ids])
     assert_(len(missing_teasers) == 0, f"Missing teaser IDs not found in class list: {missing_teasers[:20]}")
     print("  OK")
 
+    print("\n[6b] Catalogue rebuild after classes disappear")
+    from ingest_videos import build_catalogue
+    prev = json.loads(json.dumps(lib.raw(CATEGORIES)))
+    emptied = prev["categories"][-1]["slug"]
+    gone = {v.video_id for v in lib.in_category(emptied)}
+    for c in prev["categories"]:
+        gone.update((c.get("specials_video_ids") or [])[:1])
+    scratch = Library(lib.data_dir)
+    scratch.put(VIDEOS_ALL, [])
+    scratch.put(VIDEOS_CLASSES, [v.to_dict(MANIFEST_FIELDS[VIDEOS_CLASSES]) for v in classes if v.video_id not in gone])
+    rebuilt = {c["slug"]: c for c in build_catalogue(scratch, prev)["categories"]}
+    assert_(rebuilt[emptied]["class_count"] == 0 and "hero" not in rebuilt[emptied] and not rebuilt[emptied]["teaser_video_ids"],
+            f"Emptied category {emptied} kept its picks")
+    stale = sorted(tid for c in rebuilt.values() for tid in c.get("teaser_video_ids") or [] if tid not in scratch.class_ids)
+    assert_(not stale, f"Rebuilt catalogue teases removed classes: {stale[:10]}")
+    print(f"  OK: {emptied} emptied, {len(gone)} classes removed")
+
     print("\n[7] Basic internal asset refs")
     css = SITE / "assets" / "css" / "styles.css"
     js = SITE / "assets" / "js" / "site.js"
@@ -172,17 +297,277 @@ def main() -> int:
 
 
     print("\n[7b] JS syntax check (node --check)")
-    import subprocess
     res = subprocess.run(["node", "--check", str(js)], capture_output=True, text=True)
     assert_(res.returncode == 0, f"JS syntax error in site.js:\n{res.stderr or res.stdout}")
     print("  OK")
 
     print("\n[8] CP string consistency")
-    site_text = "\n".join(p.read_text(encoding="utf-8", errors="ignore") for p in required_pages)
+    site_text = "\n".join(p.read_text(encoding="utf-8", errors="ignore") for p in REQUIRED_PAGES)
     assert_("CP05" not in site_text, "Found leftover CP05 strings in site pages")
     assert_("CP06" not in site_text, "Found leftover CP06 strings in site pages")
     print("  OK")
 
+    print("\n[9] hiit56 CLI startup")
+    from hiit56 import HEAVY_MODULES, STARTUP_BUDGET_MS
+    tools = ROOT / "tools"
+    probe = (
+        "import sys; sys.path.insert(0, sys.argv[1]); "
+        "import hiit56, bench_rls, gen_timer_demos, ingest_videos, media_check, media_standin, qa_smoke, timer_events, vimeo_thumbnail_pipeline, webhook_replay, webhook_standin; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    res = subprocess.run([sys.executable, "-c", probe, str(tools)], capture_output=True, text=True)
+    assert_(res.returncode == 0, f"Tool import failed:\n{res.stderr}")
+    assert_(not res.stdout.strip(), f"Heavy modules imported at tool import time: {res.stdout.strip()}")
+    timings = []
+    for _ in range(3):
+        t0 = time.perf_counter()
+        res = subprocess.run([sys.executable, str(tools / "hiit56.py"), "--help"], capture_output=True, text=True)
+        timings.append((time.perf_counter() - t0) * 1000)
+        assert_(res.returncode == 0, f"hiit56 --help failed:\n{res.stderr}")
+    best = min(timings)
+    assert_(best < STARTUP_BUDGET_MS, f"hiit56 --help took {best:.0f} ms (budget {STARTUP_BUDGET_MS} ms)")
+    print(f"  OK: {best:.0f} ms (budget {STARTUP_BUDGET_MS} ms)")
+
+    print("\n[10] Media check, offline against the local stand-in")
+    import media_check
+    from media_standin import png, start as start_standin
+    rewrite = [("https://vimeo.com", "http://127.0.0.1:1")]
+    routed = [media_check._route(u, rewrite) for u in ("https://vimeo.com/123", "https://vimeo.com", "https://vimeo.com.evil.test/123")]
+    assert_(routed == ["http://127.0.0.1:1/123", "http://127.0.0.1:1", "https://vimeo.com.evil.test/123"],
+            f"--rewrite must match the whole origin: {routed}")
+    if media_check._aiohttp() is None:
+        print(f"  SKIP: aiohttp not installed ({media_check.INSTALL_HINT})")
+    else:
+        thumb = "https://i.vimeocdn.com/video/qa-d_295x166?region=us"
+        broken = "https://i.vimeocdn.com/video/missing-d_295x166?region=us"
+        fixture = [dict(r.to_dict(MANIFEST_FIELDS[VIDEOS_MOVES]), thumbnail_url=u) for r, u in zip(moves, (thumb, broken))]
+        server, base = start_standin()
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                Library(Path(tmp) / "data").write(VIDEOS_MOVES, fixture)
+                argv = ["--data", str(Path(tmp) / "data"), "--cache", str(Path(tmp) / "media_cache.json")]
+                for origin in ("https://i.vimeocdn.com", "https://player.vimeo.com", "https://vimeo.com"):
+                    argv += ["--rewrite", f"{origin}={base}"]
+                reports = []
+                for run in (1, 2):
+                    out = Path(tmp) / f"media{run}.json"
+                    rc = media_check.main(argv + ["--out", str(out)])
+                    assert_(rc == 1, f"media_check run {run}: exit {rc}, expected 1 (one broken URL)")
+                    reports.append(json.loads(out.read_text(encoding="utf-8")))
+        finally:
+            server.shutdown()
+            server.server_close()
+        first, second = reports
+        assert_(first["broken"] == 1 and first["broken_urls"][0]["url"] == broken and first["broken_urls"][0]["status"] == 404,
+                f"media_check did not report the broken thumbnail: {first['broken_urls']}")
+        assert_(first["ok"] == first["urls"] - 1 and first["not_modified"] == 0, f"media_check run 1: {first['ok']}/{first['urls']} ok")
+        want = {"content_type": "image/png", "size": len(png(295, 166)), "width": 295, "height": 166}
+        got = first["media"].get(thumb) or {}
+        assert_(got == dict(want, status=206), f"media_check thumbnail metadata: {got}")
+        for r in fixture:
+            page = first["media"].get(r["embed_url"]) or {}
+            assert_(page.get("status") == 200 and page.get("content_type", "").startswith("text/html"), f"media_check {r['embed_url']}: {page}")
+        # second run: every live URL answers 304 and keeps the cached metadata
+        assert_(second["ok"] == first["ok"] and second["not_modified"] == first["ok"],
+                f"media_check run 2: {second['not_modified']} of {second['ok']} ok URLs reused via 304")
+        assert_(second["media"].get(thumb) == dict(want, status=304), f"media_check 304 lost metadata: {second['media'].get(thumb)}")
+        assert_(second["broken"] == 1, "media_check run 2 lost the broken URL")
+        # every rewritten origin lands on the one stand-in host: keep-alive, capped by --per-host (16)
+        assert_(1 <= first["connections_opened"] <= 16, f"media_check opened {first['connections_opened']} connections")
+        print(f"  OK: {first['urls']} URLs, {first['broken']} broken, {second['not_modified']} reused via 304")
+
+    print("\n[11] Telemetry analyzer over gzip, plain and JSON-lines logs")
+    import telemetry_analyze
+    from telemetry_analyze import MARKER, TopK
+    rng = random.Random(56)
+    events: List[dict] = []
+    latencies: List[float] = []
+    for i in range(12000):
+        ev = {"ts": f"2026-02-07T10:{i // 1000:02d}:{i % 60:02d}Z", "session_id": f"s{rng.randrange(3000)}",
+              "href": "https://hiit56.com/app/", "label": "CP34"}
+        if i % 10:
+            ms = round(rng.lognormvariate(5, 0.8), 2)
+            latencies.append(ms)
+            ev.update(eventType="perf", payload={"latency_ms": ms})
+        else:
+            msg = "boom A" if i % 30 == 0 else "boom B" if i % 50 == 10 else f"noise {i}"
+            ev.update(eventType="frontend_error", payload={"message": msg}, href="https://hiit56.com/app/timer/")
+        events.append(ev)
+    errors = Counter(e["payload"]["message"] for e in events if e["eventType"] == "frontend_error")
+    with tempfile.TemporaryDirectory() as tmp:
+        logs = [Path(tmp) / name for name in ("a.log.gz", "b.log", "c.jsonl")]
+        lines = [[f"2026-02-07 INFO {MARKER} {json.dumps(e)}" for e in events[i::3]] for i in range(3)]
+        with gzip.open(logs[0], "wt", encoding="utf-8") as f:
+            f.write("\n".join(lines[0] + ["unrelated line"]) + "\n")
+        logs[1].write_text("\n".join(lines[1] + [f"{MARKER} handler error: x"]) + "\n", encoding="utf-8")
+        # log export: one JSON record per line, the console line in a string field
+        logs[2].write_text("".join(json.dumps({"level": "info", "message": ln}) + "\n" for ln in lines[2]), encoding="utf-8")
+        out = Path(tmp) / "summary.json"
+        rc = telemetry_analyze.main([*map(str, logs), "--out", str(out)])
+        summary = json.loads(out.read_text(encoding="utf-8"))
+    assert_(rc == 0 and summary["events"] == len(events), f"telemetry: {summary['events']} of {len(events)} events parsed")
+    assert_(summary["errors"]["events"] == sum(errors.values()), f"telemetry: {summary['errors']['events']} errors, expected {sum(errors.values())}")
+    # count-min never under-counts and over-counts by at most e/width of the stream
+    slack = math.ceil(math.e / 2048 * sum(errors.values()))
+    top = dict(summary["errors"]["top"]["message"][:2])
+    for msg, n in errors.most_common(2):
+        assert_(n <= top.get(msg, -1) <= n + slack, f"telemetry top-k {msg!r}: {top.get(msg)} vs {n} (+{slack})")
+    # HyperLogLog p=12: ~1.6% standard error; allow 3x
+    sessions = len({e["session_id"] for e in events})
+    assert_(abs(summary["distinct"]["sessions"] - sessions) <= 0.05 * sessions,
+            f"telemetry HLL sessions {summary['distinct']['sessions']} vs {sessions}")
+    # t-digest at compression 100 is within a fraction of a percent here; allow 2%
+    latencies.sort()
+    for q in (0.95, 0.99):
+        exact = latencies[math.ceil(q * len(latencies)) - 1]
+        got = summary["latency_ms"][f"p{int(q * 100)}"]
+        assert_(abs(got - exact) <= 0.02 * exact, f"telemetry p{int(q * 100)} {got} ms vs exact {exact} ms")
+    topk = TopK(k=5)
+    most = 0
+    for i in range(5000):
+        topk.add("hot" if i % 3 == 0 else f"key {i}")
+        most = max(most, len(topk.candidates))
+    assert_(most <= topk.capacity and topk.top()[0][0] == "hot", f"TopK kept {most} candidates (capacity {topk.capacity})")
+    print(f"  OK: {summary['events']} events, {summary['errors']['events']} errors, sessions ~{summary['distinct']['sessions']} of {sessions}")
+
+    print("\n[12] bench_rls helpers that don't need Postgres")
+    import bench_rls
+    from bench_rls import Pool, _percentile, migration_files, seq_scans
+    assert_(_percentile([], 0.95) is None, "percentile of no samples should be None")
+    ms = [float(i) for i in range(1, 11)]
+    got = [_percentile(ms, q) for q in (0.0, 0.1, 0.5, 0.95, 1.0)]
+    assert_(got == [1.0, 1.0, 5.0, 10.0, 10.0], f"nearest-rank percentiles wrong: {got}")
+
+    # loops multiply both counts; only scans reading SEQ_SCAN_REPORT_ROWS+ rows are reported
+    plan = {"Plan": {"Node Type": "Nested Loop", "Plans": [
+        {"Node Type": "Index Scan", "Relation Name": "tenants", "Actual Rows": 1, "Actual Loops": 1},
+        {"Node Type": "Hash", "Plans": [
+            {"Node Type": "Seq Scan", "Relation Name": "posts", "Actual Rows": 10, "Rows Removed by Filter": 600, "Actual Loops": 2},
+        ]},
+        {"Node Type": "Seq Scan", "Relation Name": "blocks", "Actual Rows": 5, "Rows Removed by Filter": 900, "Actual Loops": 1},
+    ]}}
+    found = seq_scans(plan)
+    assert_(found == ["posts: Seq Scan read 1,220 rows, kept 20"], f"seq_scans reported {found}")
+    assert_(seq_scans({}) == [], "seq_scans of an empty plan should report nothing")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        names = ["2026-02-20_000000_NDYRA_CP33_Waivers.sql", "NDYRA_CP27_SocialCore.sql", "NDYRA_CP27_RLS_Tests_v7.sql",
+                 "NDYRA_CP27_AntiDrift_Audit_v7.sql", "NDYRA_CP9_Base.sql", "README.md"]
+        for name in names:
+            (Path(tmp) / name).write_text("-- x\n", encoding="utf-8")
+        got = [p.name for p in migration_files(Path(tmp))]
+    want = ["NDYRA_CP9_Base.sql", "NDYRA_CP27_SocialCore.sql", "2026-02-20_000000_NDYRA_CP33_Waivers.sql"]
+    assert_(got == want, f"migration order {got}, expected {want}")
+
+    # one connection, two queued waiters: hand-offs go oldest first, and a worker
+    # that just released can't jump the queue
+    pool = Pool("fake", 1, opener=lambda dsn: object())
+    order: List[str] = []
+
+    def use(name: str) -> None:
+        with pool.connection():
+            order.append(name)
+            time.sleep(0.02)
+
+    workers = []
+    with pool.connection():
+        for name in ("first", "second"):
+            queued = len(pool._waiters) + 1
+            workers.append(threading.Thread(target=use, args=(name,)))
+            workers[-1].start()
+            deadline = time.monotonic() + 5
+            while len(pool._waiters) < queued and time.monotonic() < deadline:
+                time.sleep(0.001)
+    use("releaser")
+    for w in workers:
+        w.join(5)
+    assert_(order == ["first", "second", "releaser"], f"pool served {order}, expected FIFO")
+
+    with contextlib.redirect_stderr(io.StringIO()) as err:
+        try:
+            bench_rls.main(["--tenants", "0"])
+            code = 0
+        except SystemExit as e:
+            code = e.code
+    assert_(code == 2 and "--tenants" in err.getvalue(), "bench_rls should reject --tenants 0 before connecting")
+    print("  OK: percentiles, seq scan report, migration order, FIFO pool, --tenants check")
+
+    print("\n[13] Webhook replay against the local stand-in handler")
+    import webhook_replay
+    from webhook_replay import compare_mirror, expected_state, generate, sign
+    from webhook_standin import start as start_webhook_standin, verify
+    body = '{"id":"evt_qa"}'
+    mac = hmac.new(b"whsec_qa", b"1700000000." + body.encode("utf-8"), hashlib.sha256).hexdigest()
+    sig = sign("whsec_qa", body, 1700000000)
+    assert_(sig == f"t=1700000000,v1={mac}", f"Stripe-Signature format: {sig}")
+    assert_(verify("whsec_qa", body.encode("utf-8"), sig, now=1700000000), "stand-in rejects a valid signature")
+    for args, why in (((b'{"id":"evt_qb"}', sig, 1700000000), "a changed body"),
+                      ((body.encode("utf-8"), sig, 1700000301), "a stale timestamp")):
+        assert_(not verify("whsec_qa", *args), f"stand-in accepts {why}")
+    assert_(not verify("whsec_other", body.encode("utf-8"), sig, now=1700000000), "stand-in accepts the wrong secret")
+
+    events, deliveries = generate(60, rate=0, duplicate_rate=0.2, reorder_rate=0.3, redelivery_rate=0.1,
+                                  users=1000, base_ts=1700000000, seed=56, run="qa")
+    kinds = Counter(d.kind for d in deliveries)
+    assert_(kinds["duplicate"] and kinds["reordered"] and kinds["redelivery"], f"generate() delivery kinds: {dict(kinds)}")
+    assert_(len(deliveries) == len(events) + kinds["duplicate"] + kinds["redelivery"], "generate(): deliveries don't add up")
+    first_due = {d.event.id: d.due for d in deliveries if d.kind in ("original", "reordered")}
+    assert_(len(first_due) == len(events), "generate(): an event has no first delivery")
+    order = {e.id: i for i, e in enumerate(events)}
+    swapped = [
+        (a, b) for a in deliveries for b in deliveries
+        if a.kind == b.kind == "reordered" and a.event.sub_id == b.event.sub_id
+        and order[a.event.id] < order[b.event.id] and a.due > b.due
+    ]
+    assert_(swapped, "generate(): no later event of a subscription is delivered before an earlier one")
+    late = [d for d in deliveries if d.kind == "redelivery" and d.due < first_due[d.event.id] + 0.5]
+    assert_(not late, f"generate(): {len(late)} redeliveries arrive less than 0.5 s after the original")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server, base = start_webhook_standin("whsec_qa", fail_rate=0.1)
+        try:
+            out = Path(tmp) / "replay.json"
+            common = ["--url", f"{base}/.netlify/functions/stripe_webhook", "--rate", "0", "--concurrency", "8",
+                      "--backoff", "0.2", "--timeout", "5", "--out", str(out)]
+            with contextlib.redirect_stderr(io.StringIO()):
+                rc = webhook_replay.main(["--secret", "whsec_qa", "--subscriptions", "40", "--duplicate-rate", "0.2", *common])
+            report = json.loads(out.read_text(encoding="utf-8"))
+            received = Counter(server.received)
+            with contextlib.redirect_stderr(io.StringIO()):
+                bad_rc = webhook_replay.main(["--secret", "whsec_wrong", "--subscriptions", "3", "--max-attempts", "2", *common])
+            bad = json.loads(out.read_text(encoding="utf-8"))
+        finally:
+            server.shutdown()
+            server.server_close()
+    sent = report["deliveries"]
+    fails = report["http_status"].get("500", 0)
+    assert_(rc == 0 and report["pass"] and report["unprocessed"] == 0, f"replay should pass: rc={rc}, {report['unprocessed']} unprocessed")
+    assert_(fails and sent.get("retry") == fails, f"every 500 should be retried once: {fails} failures, {sent.get('retry')} retries")
+    assert_(report["attempts"] == sum(sent.values()) and len(received) == report["events"],
+            f"replay sent {report['attempts']} attempts for {len(received)} of {report['events']} events")
+    assert_(sent.get("duplicate") and max(received.values()) >= 2, "no event reached the handler twice")
+    assert_(report["lag_sec"]["max"] >= 0.2, f"lag should include the retry backoff: max {report['lag_sec']['max']} s")
+    assert_(bad_rc == 1 and not bad["pass"] and bad["unprocessed"] == bad["events"], "a replay with the wrong secret should fail")
+    assert_(bad["http_status"] == {"400": bad["attempts"]} and bad["attempts"] == 2 * bad["deliveries"].get("retry", 0),
+            f"wrong-secret deliveries should be tried twice each: {bad['deliveries']}, {bad['attempts']} attempts")
+
+    expected = expected_state(events)
+    rows = [
+        (sub_id, obj["status"], obj["metadata"]["plan_key"], obj["metadata"]["subject_type"], obj["metadata"]["subject_id"],
+         datetime.fromtimestamp(obj["current_period_end"], tz=timezone.utc))
+        for sub_id, obj in expected.items()
+    ]
+    clean = compare_mirror(rows, expected)
+    assert_(not (clean["duplicate_rows"] or clean["missing"] or clean["stale"]), f"clean mirror flagged: {clean}")
+    stale_row = rows[1][:5] + (rows[1][5] - timedelta(days=30),)
+    flagged = compare_mirror([rows[0], rows[0], stale_row, *rows[3:]], expected)
+    assert_(flagged["duplicate_rows"] == 1 and flagged["samples"]["duplicate_rows"][0]["stripe_subscription_id"] == rows[0][0],
+            f"duplicate mirror row not flagged: {flagged['samples']['duplicate_rows']}")
+    assert_(flagged["stale"] == 1 and flagged["samples"]["stale"][0]["stripe_subscription_id"] == rows[1][0],
+            f"stale mirror row not flagged: {flagged['samples']['stale']}")
+    assert_(flagged["missing"] == 1 and flagged["samples"]["missing"] == [rows[2][0]], f"missing row not flagged: {flagged['samples']['missing']}")
+    print(f"  OK: {report['events']} events, {report['attempts']} attempts ({fails} x 500 retried), lag max {report['lag_sec']['max']} s")
+
     print("\nPASS ✅")
     return 0
 
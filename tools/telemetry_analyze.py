@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""HIIT56 — streaming analyzer for `[HIIT56][telemetry]` function log lines.
+
+netlify/functions/telemetry_ingest.js logs one JSON line per client event:
+
+  [HIIT56][telemetry] {"ts": "...", "ip": "...", "eventType": "frontend_error",
+                       "payload": {"message": "...", "stack": "..."}, "href": "...",
+                       "build_id": "...", "label": "CP34", "session_id": "...", "ua": "..."}
+
+This reads exported logs of any size (plain or gzip, detected by magic bytes,
+`-` for stdin), parses only the telemetry lines, and prints a compact JSON
+summary meant to be diffed across builds: event types, plus error counts by
+message, page and build label (error event types only, see ERROR_EVENT_TYPES).
+
+Memory stays bounded: counts go into count-min sketches (plus a small top-k
+candidate table), distinct sessions/IPs/error messages into HyperLogLog, and
+latencies into a t-digest. No event is kept after it has been counted. The
+only structure that grows is the per-window rate series (one int per window).
+
+Usage:
+  python tools/telemetry_analyze.py netlify-logs.txt.gz --out telemetry_summary.json
+  python tools/telemetry_analyze.py logs/*.log --window 60 --top 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import gzip
+import hashlib
+import heapq
+import io
+import json
+import math
+import sys
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+
+MARKER = "[HIIT56][telemetry]"
+SCHEMA = "hiit56.telemetry_summary.v2"
+GZIP_MAGIC = b"\x1f\x8b"
+
+# eventTypes counted as errors (site.js v56ReportError sends frontend_error);
+# any other `*_error` type counts too
+ERROR_EVENT_TYPES = ("frontend_error",)
+# payload fields that carry a duration, first match wins
+LATENCY_FIELDS = ("latency_ms", "duration_ms", "elapsed_ms")
+
+
+def _hash64(key: str, salt: bytes = b"") -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8, salt=salt).digest(), "little")
+
+
+class CountMinSketch:
+    """Approximate counts in width*depth ints. Never under-counts; over-counts by <= e/width * N w.p. 1-e^-depth."""
+
+    def __init__(self, width: int = 2048, depth: int = 4) -> None:
+        self.width = width
+        self.depth = depth
+        self.rows = [array("q", bytes(8 * width)) for _ in range(depth)]
+        self.total = 0
+
+    def _cols(self, key: str) -> Iterator[int]:
+        # double hashing: h1 + i*h2 gives `depth` independent-enough columns from one digest
+        h = _hash64(key)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        for i in range(self.depth):
+            yield (h1 + i * h2) % self.width
+
+    def add(self, key: str, n: int = 1) -> int:
+        """Add `n` to `key` and return its new estimate."""
+        self.total += n
+        est = None
+        for row, col in zip(self.rows, self._cols(key)):
+            row[col] += n
+            est = row[col] if est is None else min(est, row[col])
+        return int(est or 0)
+
+    def query(self, key: str) -> int:
+        return min(row[col] for row, col in zip(self.rows, self._cols(key)))
+
+
+class TopK:
+    """Heavy hitters over a count-min sketch; keeps at most `capacity` candidate keys."""
+
+    def __init__(self, k: int = 20, capacity: Optional[int] = None, **cms_kw: int) -> None:
+        self.k = k
+        self.capacity = capacity or 4 * k
+        self.cms = CountMinSketch(**cms_kw)
+        self.candidates: Dict[str, int] = {}
+
+    def add(self, key: str) -> None:
+        est = self.cms.add(key)
+        if key in self.candidates or len(self.candidates) < self.capacity:
+            self.candidates[key] = est
+            return
+        low_key = min(self.candidates, key=self.candidates.__getitem__)
+        if est > self.candidates[low_key]:
+            del self.candidates[low_key]
+            self.candidates[key] = est
+
+    def top(self) -> List[Tuple[str, int]]:
+        est = {k: self.cms.query(k) for k in self.candidates}
+        return heapq.nlargest(self.k, sorted(est.items()), key=lambda kv: kv[1])
+
+
+class HyperLogLog:
+    """Distinct-count estimate in 2**p one-byte registers (~1.04/sqrt(2**p) relative error)."""
+
+    def __init__(self, p: int = 12) -> None:
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(self.m)
+
+    def add(self, key: str) -> None:
+        h = _hash64(key, salt=b"hll")
+        idx = h >> (64 - self.p)
+        rest = (h << self.p) & 0xFFFFFFFFFFFFFFFF
+        # position of the first 1-bit in the remaining 64-p bits
+        rank = 64 - rest.bit_length() + 1 if rest else 64 - self.p + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        est = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if est <= 2.5 * m and zeros:
+            est = m * math.log(m / zeros)  # small-range correction
+        return int(round(est))
+
+
+class TDigest:
+    """Merging t-digest.
+
+    The centroid count grows with log(n), not n. At compression=100 it is
+    about 440 centroids after 10k samples, 640 after 200k and 740 after 1M:
+    the k1 limit keeps the outermost centroids at a single sample each.
+    """
+
+    def __init__(self, compression: int = 100, buffer_size: int = 500) -> None:
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.means: List[float] = []
+        self.weights: List[float] = []
+        self.buffer: List[float] = []
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float) -> None:
+        self.buffer.append(x)
+        self.count += 1
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        if len(self.buffer) >= self.buffer_size:
+            self._merge()
+
+    def _merge(self) -> None:
+        if not self.buffer:
+            return
+        points = sorted(list(zip(self.means, self.weights)) + [(x, 1.0) for x in self.buffer])
+        self.buffer = []
+        total = sum(w for _, w in points)
+        means: List[float] = []
+        weights: List[float] = []
+        seen = 0.0
+        cur_m, cur_w = points[0]
+        for m, w in points[1:]:
+            q = (seen + cur_w + w) / total
+            # k1 scale: centroids near the tails stay small, so p99 stays sharp
+            limit = 4 * total * q * (1 - q) / self.compression
+            if cur_w + w <= max(1.0, limit):
+                cur_m = (cur_m * cur_w + m * w) / (cur_w + w)
+                cur_w += w
+            else:
+                means.append(cur_m)
+                weights.append(cur_w)
+                seen += cur_w
+                cur_m, cur_w = m, w
+        means.append(cur_m)
+        weights.append(cur_w)
+        self.means, self.weights = means, weights
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._merge()
+        if not self.means:
+            return None
+        if len(self.means) == 1:
+            return self.means[0]
+        target = q * self.count
+        # centroid i covers cumulative weight around its midpoint
+        mids: List[float] = []
+        cum = 0.0
+        for w in self.weights:
+            mids.append(cum + w / 2)
+            cum += w
+        if target <= mids[0]:
+            return self.min + (self.means[0] - self.min) * (target / mids[0] if mids[0] else 0)
+        if target >= mids[-1]:
+            span = self.count - mids[-1]
+            return self.means[-1] + (self.max - self.means[-1]) * ((target - mids[-1]) / span if span else 0)
+        i = bisect.bisect_right(mids, target) - 1
+        t = (target - mids[i]) / (mids[i + 1] - mids[i])
+        return self.means[i] + t * (self.means[i + 1] - self.means[i])
+
+
+def open_log(path: str) -> IO[str]:
+    """Text stream over a plain or gzip log; gzip is detected by magic bytes, not extension.
+
+    Closing the stream closes the file (but never stdin).
+    """
+    if path == "-":
+        buffered = sys.stdin.buffer if isinstance(sys.stdin.buffer, io.BufferedReader) else io.BufferedReader(sys.stdin.buffer)
+        if buffered.peek(2)[:2] == GZIP_MAGIC:
+            return io.TextIOWrapper(gzip.GzipFile(fileobj=buffered), encoding="utf-8", errors="replace")
+        return io.TextIOWrapper(buffered, encoding="utf-8", errors="replace")
+    with open(path, "rb") as f:
+        magic = f.read(2)
+    if magic == GZIP_MAGIC:
+        # gzip.open owns the file it opens; GzipFile(fileobj=...) would leave it open
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
+
+
+def parse_line(line: str) -> Optional[Dict[str, Any]]:
+    """The telemetry event on `line`, or None if it isn't one (or is a handler error line)."""
+    if line.lstrip().startswith("{"):
+        # JSON-lines log export: the console line is a string field of the record
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            return None
+        if not isinstance(rec, dict):
+            return None
+        msg = next((v for v in rec.values() if isinstance(v, str) and MARKER in v), None)
+        return parse_line(msg) if msg is not None else None
+    pos = line.find(MARKER)
+    if pos < 0:
+        return None
+    rest = line[pos + len(MARKER):].strip()
+    if not rest.startswith("{"):
+        return None
+    try:
+        event, _ = json.JSONDecoder().raw_decode(rest)
+    except ValueError:
+        return None
+    return event if isinstance(event, dict) else None
+
+
+def _parse_ts(value: Any) -> Optional[float]:
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _page(href: Any) -> str:
+    if not isinstance(href, str) or not href:
+        return "(unknown)"
+    return urlsplit(href).path or "/"
+
+
+def is_error(event_type: str) -> bool:
+    return event_type in ERROR_EVENT_TYPES or event_type.endswith("_error")
+
+
+def _latency(event: Dict[str, Any]) -> Optional[float]:
+    for src in (event.get("payload"), event):
+        if isinstance(src, dict):
+            for f in LATENCY_FIELDS:
+                v = src.get(f)
+                if isinstance(v, (int, float)) and not isinstance(v, bool) and v >= 0:
+                    return float(v)
+    return None
+
+
+class Summary:
+    def __init__(self, *, top: int = 20, window_sec: int = 300) -> None:
+        self.window_sec = window_sec
+        self.lines = 0
+        self.events = 0
+        self.first_ts: Optional[float] = None
+        self.last_ts: Optional[float] = None
+        self.errors = 0
+        self.by_type = TopK(top)
+        # error events only: perf marks and other telemetry would bury them
+        self.errors_by = {dim: TopK(top) for dim in ("message", "page", "build")}
+        self.distinct = {dim: HyperLogLog() for dim in ("sessions", "ips", "error_messages")}
+        self.latency = TDigest()
+        self.windows: Dict[int, int] = {}
+
+    def add(self, event: Dict[str, Any]) -> None:
+        self.events += 1
+        event_type = str(event.get("eventType") or "(none)")
+        self.by_type.add(event_type)
+        if is_error(event_type):
+            self.errors += 1
+            payload = event.get("payload") if isinstance(event.get("payload"), dict) else {}
+            message = str(payload.get("message") or event.get("message") or "(none)")[:300]
+            self.errors_by["message"].add(message)
+            self.errors_by["page"].add(_page(event.get("href")))
+            self.errors_by["build"].add(str(event.get("label") or event.get("build_id") or "(unknown)"))
+            self.distinct["error_messages"].add(message)
+
+        if event.get("session_id"):
+            self.distinct["sessions"].add(str(event["session_id"]))
+        if event.get("ip"):
+            self.distinct["ips"].add(str(event["ip"]))
+
+        ms = _latency(event)
+        if ms is not None:
+            self.latency.add(ms)
+
+        ts = _parse_ts(event.get("ts"))
+        if ts is not None:
+            self.first_ts = ts if self.first_ts is None else min(self.first_ts, ts)
+            self.last_ts = ts if self.last_ts is None else max(self.last_ts, ts)
+            w = int(ts // self.window_sec) * self.window_sec
+            self.windows[w] = self.windows.get(w, 0) + 1
+
+    def consume(self, lines: Iterable[str]) -> None:
+        for line in lines:
+            self.lines += 1
+            if MARKER not in line:
+                continue
+            event = parse_line(line)
+            if event is not None:
+                self.add(event)
+
+    def to_json(self) -> Dict[str, Any]:
+        series = sorted(self.windows.items())
+        peak = max((n for _, n in series), default=0)
+        span_min = ((self.last_ts - self.first_ts) / 60) if self.first_ts is not None and self.last_ts is not None else 0
+        lat = self.latency
+        pct = {f"p{int(q * 100)}": lat.quantile(q) for q in (0.5, 0.9, 0.95, 0.99)}
+        return {
+            "schema": SCHEMA,
+            "lines_read": self.lines,
+            "events": self.events,
+            "first_ts": _iso(self.first_ts) if self.first_ts is not None else None,
+            "last_ts": _iso(self.last_ts) if self.last_ts is not None else None,
+            "distinct": {k: h.count() for k, h in self.distinct.items()},
+            "top_event_types": [[key, n] for key, n in self.by_type.top()],
+            "errors": {
+                "events": self.errors,
+                "top": {k: [[key, n] for key, n in t.top()] for k, t in self.errors_by.items()},
+            },
+            "rate": {
+                "window_sec": self.window_sec,
+                "events_per_min": round(self.events / span_min, 3) if span_min > 0 else None,
+                "peak_window_events": peak,
+                "series": [[_iso(w), n] for w, n in series],
+            },
+            "latency_ms": {
+                "count": lat.count,
+                **{k: (round(v, 1) if v is not None else None) for k, v in pct.items()},
+                "max": round(lat.max, 1) if lat.count else None,
+            },
+        }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Summarize [HIIT56][telemetry] lines from exported function logs")
+    ap.add_argument("logs", nargs="+", help="Log files (plain or gzip); '-' reads stdin")
+    ap.add_argument("--out", help="Write the JSON summary here (default: stdout)")
+    ap.add_argument("--top", type=int, default=20, help="Entries per top-k list")
+    ap.add_argument("--window", type=int, default=300, help="Rate window in seconds")
+    args = ap.parse_args(argv)
+
+    summary = Summary(top=args.top, window_sec=args.window)
+    for path in args.logs:
+        if path != "-" and not Path(path).exists():
+            print(f"ERROR: Log not found: {path}", file=sys.stderr)
+            return 2
+        with open_log(path) as f:
+            summary.consume(f)
+
+    text = json.dumps(summary.to_json(), indent=2, sort_keys=True)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+        print(f"Wrote: {args.out} ({summary.events} events from {summary.lines} lines)", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,281 @@
+"""HIIT56 — precomputed cue and display event tables for timer timelines.
+
+Why:
+- The timer pages work out countdown beeps, segment cues and the "next up"
+  preview from `segments` on every animation frame, on low-end phones.
+- `compile_events(segments)` turns a timeline into one sorted event table. A
+  player keeps a cursor into it and compares the clock against a single
+  timestamp per frame; QA verifies every cue in one pass over the table.
+
+Table layout (one per demo, keyed by demo id under `demos` in
+timer_events.json, written minified), one parallel int array per column:
+
+  {"schema": "hiit56.timer_events.v1",
+   "types": ["segment_start", "next_up", "halfway", "countdown", "complete"],
+   "beeps": ["start", "work", "rest", "move_a", "move_b", "station", "complete"],
+   "t_ms":    [0, 0, 30000, 57000, ...],   # ms from timer start, ascending
+   "type":    [0, 1, 2, 3, ...],           # index into types
+   "segment": [0, 0, 0, 0, ...],           # segment the event belongs to
+   "payload": [0, 0, 30, 3, ...]}          # meaning depends on type, see below
+
+Payload by type:
+  segment_start  index into beeps: the pattern site.js beepPattern() plays
+  next_up        index of the next WORK segment (its meta has move_name and
+                 video_embed_url), -1 when no WORK is left
+  halfway        whole seconds left in the WORK segment
+  countdown      seconds left, 3/2/1, on the same ticks site.js
+                 maybeCountdownBeep() beeps on
+  complete       index into beeps
+
+Events at the same time are ordered by type, as listed above.
+
+Usage:
+  from timer_events import EventTable, compile_events
+
+  table = EventTable.from_json(lib.timer_events[demo["id"]])
+  cur = table.cursor()
+  for ev in cur.due(now_ms):   # every event with t_ms <= now_ms not yet yielded
+      ...
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+SCHEMA = "hiit56.timer_events.v1"
+
+SEGMENT_START, NEXT_UP, HALFWAY, COUNTDOWN, COMPLETE = range(5)
+TYPES = ("segment_start", "next_up", "halfway", "countdown", "complete")
+BEEPS = ("start", "work", "rest", "move_a", "move_b", "station", "complete")
+# site.js beepNameForKind(); unknown kinds beep like WORK
+BEEP_FOR_KIND = {
+    "WORK": "work",
+    "REST": "rest",
+    "MOVE_TRANSITION_A": "move_a",
+    "MOVE_TRANSITION_B": "move_b",
+    "STATION_STAGE_TRANSITION": "station",
+}
+COUNTDOWN_SEC = 3
+_COLUMNS = ("t_ms", "type", "segment", "payload")
+
+
+class Event(NamedTuple):
+    t_ms: int
+    type: str
+    segment: int
+    payload: int
+
+
+def _duration_ms(seg: Mapping[str, Any]) -> int:
+    return int(round(float(seg.get("duration_sec") or 0) * 1000))
+
+
+def _beep(seg: Mapping[str, Any], index: int) -> int:
+    return BEEPS.index("start" if index == 0 else BEEP_FOR_KIND.get(seg.get("kind"), "work"))
+
+
+def _next_work(segments: Sequence[Mapping[str, Any]]) -> List[int]:
+    """For each segment, the index of the first WORK segment after it, or -1."""
+    out = [-1] * len(segments)
+    nxt = -1
+    for i in range(len(segments) - 1, -1, -1):
+        out[i] = nxt
+        if segments[i].get("kind") == "WORK":
+            nxt = i
+    return out
+
+
+def _countdown_times(start: int, end: int) -> List[tuple]:
+    """(t_ms, seconds left) of the countdown beeps of one segment.
+
+    site.js beeps when ceil(seconds left) first becomes 3, 2 and 1; a segment
+    shorter than that starts mid-countdown and beeps once at its start.
+    """
+    out = []
+    first = math.ceil((end - start) / 1000)
+    for k in range(COUNTDOWN_SEC, 0, -1):
+        t = end - k * 1000
+        if t >= start:
+            out.append((t, k))
+        elif k == first:
+            out.append((start, k))
+    return out
+
+
+class EventTable:
+    """Parallel int arrays, sorted by (t_ms, type)."""
+
+    __slots__ = _COLUMNS
+
+    def __init__(self, t_ms: Sequence[int] = (), type: Sequence[int] = (), segment: Sequence[int] = (), payload: Sequence[int] = ()) -> None:
+        self.t_ms = array("i", t_ms)
+        self.type = array("b", type)
+        self.segment = array("i", segment)
+        self.payload = array("i", payload)
+        if not len(self.t_ms) == len(self.type) == len(self.segment) == len(self.payload):
+            raise ValueError("event table columns differ in length")
+
+    @classmethod
+    def from_json(cls, data: Mapping[str, Any]) -> "EventTable":
+        if not isinstance(data, Mapping) or data.get("schema") != SCHEMA:
+            raise ValueError(f"not a {SCHEMA} table")
+        if tuple(data.get("types") or ()) != TYPES or tuple(data.get("beeps") or ()) != BEEPS:
+            raise ValueError("event table uses different type/beep codes")
+        return cls(*(data.get(c) or () for c in _COLUMNS))
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "schema": SCHEMA,
+            "types": list(TYPES),
+            "beeps": list(BEEPS),
+            **{c: getattr(self, c).tolist() for c in _COLUMNS},
+        }
+
+    def __len__(self) -> int:
+        return len(self.t_ms)
+
+    def __getitem__(self, i: int) -> Event:
+        return Event(self.t_ms[i], TYPES[self.type[i]], self.segment[i], self.payload[i])
+
+    def __iter__(self) -> Iterator[Event]:
+        return (self[i] for i in range(len(self)))
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, EventTable) and all(getattr(self, c) == getattr(other, c) for c in _COLUMNS)
+
+    def cursor(self, t_ms: int = 0) -> "Cursor":
+        return Cursor(self, t_ms)
+
+
+class Cursor:
+    """Position in an EventTable. `due(now)` yields each event once, in order."""
+
+    __slots__ = ("table", "pos")
+
+    def __init__(self, table: EventTable, t_ms: int = 0) -> None:
+        self.table = table
+        self.seek(t_ms)
+
+    def seek(self, t_ms: int) -> None:
+        """Move to the first event at or after `t_ms` (after a scrub or cap change)."""
+        self.pos = bisect_left(self.table.t_ms, t_ms)
+
+    def next_time(self) -> Optional[int]:
+        """When the next event is due; None once the table is exhausted."""
+        return self.table.t_ms[self.pos] if self.pos < len(self.table) else None
+
+    def due(self, now_ms: int) -> Iterator[Event]:
+        t = self.table.t_ms
+        while self.pos < len(t) and t[self.pos] <= now_ms:
+            ev = self.table[self.pos]
+            self.pos += 1
+            yield ev
+
+
+def _timeline(segments: Sequence[Mapping[str, Any]]) -> Iterator[Tuple[int, int, List[tuple]]]:
+    """(start ms, end ms, cue rows) of each segment, in order. Rows are (t_ms, type, segment, payload)."""
+    next_work = _next_work(segments)
+    announced: Optional[int] = None
+    start = 0
+    for i, seg in enumerate(segments):
+        dur = _duration_ms(seg)
+        end = start + dur
+        rows = [(start, SEGMENT_START, i, _beep(seg, i))]
+        if next_work[i] != announced:
+            announced = next_work[i]
+            rows.append((start, NEXT_UP, i, announced))
+        half = start + dur // 2
+        if seg.get("kind") == "WORK" and end - half > COUNTDOWN_SEC * 1000:
+            rows.append((half, HALFWAY, i, math.ceil((end - half) / 1000)))
+        rows.extend((t, COUNTDOWN, i, k) for t, k in _countdown_times(start, end))
+        yield start, end, rows
+        start = end
+
+
+def compile_events(segments: Sequence[Mapping[str, Any]]) -> EventTable:
+    """The event table of a timeline, in the order a player needs it."""
+    rows = []
+    end = 0
+    for _, end, seg_rows in _timeline(segments):
+        rows.extend(seg_rows)
+    if segments:
+        rows.append((end, COMPLETE, len(segments) - 1, BEEPS.index("complete")))
+    rows.sort()
+    return EventTable(*zip(*rows)) if rows else EventTable()
+
+
+def events_file(programs: Iterable[Mapping[str, Any]]) -> Dict[str, Any]:
+    """The timer_events.json payload for demos (or any programs with `id` and `segments`)."""
+    return {
+        "schema": SCHEMA,
+        "demos": {p["id"]: compile_events(p.get("segments") or []).to_json() for p in programs},
+    }
+
+
+def check(segments: Sequence[Mapping[str, Any]], table: EventTable) -> List[str]:
+    """Cue errors in `table`, found in one pass over its events.
+
+    Reports events that are out of order or wrong, and cues a segment should
+    have but doesn't (a dropped countdown, halfway or next_up).
+    """
+    problems: List[str] = []
+    n = len(segments)
+    next_work = _next_work(segments)
+    timeline = _timeline(segments)
+    seg_i, start, end = -1, 0, 0
+    # (type, payload) of the cues the current segment has not shown yet
+    want: Set[Tuple[int, int]] = set()
+    complete = False
+    last = (-1, -1)
+
+    def missing() -> None:
+        problems.extend(f"segment {seg_i}: missing {TYPES[t]} ({p})" for t, p in sorted(want))
+
+    for i, ev in enumerate(table):
+        at = f"event {i} ({ev.type} @ {ev.t_ms} ms)"
+        key = (ev.t_ms, table.type[i])
+        if key < last:
+            problems.append(f"{at}: out of order")
+        last = key
+        if not 0 <= ev.segment < n or ev.segment < seg_i:
+            problems.append(f"{at}: bad segment index {ev.segment}")
+            continue
+        while seg_i < ev.segment:
+            missing()
+            start, end, rows = next(timeline)
+            seg_i += 1
+            want = {(r[1], r[3]) for r in rows}
+        seg = segments[seg_i]
+        want.discard((table.type[i], ev.payload))
+
+        if ev.type == "segment_start":
+            if ev.t_ms != start:
+                problems.append(f"{at}: segment {ev.segment} should start at {start} ms")
+            if ev.payload != _beep(seg, ev.segment):
+                problems.append(f"{at}: wrong beep {ev.payload}")
+        elif ev.type == "next_up":
+            if ev.t_ms != start or ev.payload != next_work[ev.segment]:
+                problems.append(f"{at}: next WORK after segment {ev.segment} is {next_work[ev.segment]}, not {ev.payload}")
+        elif ev.type == "halfway":
+            if seg.get("kind") != "WORK" or ev.t_ms != start + (end - start) // 2:
+                problems.append(f"{at}: not the halfway point of a WORK segment")
+        elif ev.type == "countdown":
+            if not (start <= ev.t_ms < end and 1 <= ev.payload <= COUNTDOWN_SEC and ev.payload == math.ceil((end - ev.t_ms) / 1000)):
+                problems.append(f"{at}: countdown {ev.payload} does not match {end - ev.t_ms} ms left")
+        elif ev.type == "complete":
+            complete = True
+            if i != len(table) - 1 or ev.segment != n - 1 or ev.t_ms != end:
+                problems.append(f"{at}: complete must be the last event, at {end} ms")
+
+    # segments after the last event
+    missing()
+    for _, _, rows in timeline:
+        seg_i += 1
+        want = {(r[1], r[3]) for r in rows}
+        missing()
+    if n and not complete:
+        problems.append("missing complete event")
+    return problems
@@ -39,6 +39,8 @@ from __future__ import annotations
 
 import argparse
 import csv
+import functools
+import io
 import json
 import os
 import re
@@ -47,26 +49,42 @@ import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import urllib.request
 
-# Optional dependencies (script works without them)
-try:
-    from PIL import Image, ImageFilter, ImageStat  # type: ignore
-except Exception:
-    Image = None  # type: ignore
-    ImageFilter = None  # type: ignore
-    ImageStat = None  # type: ignore
+from library import Library, library_for, unique_video_ids
 
-try:
-    import cv2  # type: ignore
-except Exception:
-    cv2 = None  # type: ignore
 
-try:
-    import requests  # type: ignore
-except Exception:
-    requests = None  # type: ignore
+# Optional dependencies (script works without them). They are imported on first
+# use, so `--fast` runs and `hiit56 --help` never pay for Pillow/OpenCV/requests.
+@functools.lru_cache(maxsize=None)
+def _requests() -> Any:
+    try:
+        import requests  # type: ignore
+    except Exception:
+        return None
+    return requests
+
+
+@functools.lru_cache(maxsize=None)
+def _pil() -> Any:
+    try:
+        import PIL.Image  # type: ignore
+        import PIL.ImageChops  # type: ignore
+        import PIL.ImageFilter  # type: ignore
+        import PIL.ImageStat  # type: ignore
+    except Exception:
+        return None
+    return PIL
+
+
+@functools.lru_cache(maxsize=None)
+def _cv2() -> Any:
+    try:
+        import cv2  # type: ignore
+    except Exception:
+        return None
+    return cv2
 
-import urllib.request
 
 VIMEO_API_BASE = "https://api.vimeo.com"
 
@@ -90,6 +108,7 @@ def http_json(url: str, token: str, *, timeout: int = 30) -> Dict[str, Any]:
         "Authorization": f"bearer {token}",
         "Accept": "application/vnd.vimeo.*+json;version=3.4",
     }
+    requests = _requests()
     if requests is not None:
         r = requests.get(url, headers=headers, timeout=timeout)
         r.raise_for_status()
@@ -102,6 +121,7 @@ def http_json(url: str, token: str, *, timeout: int = 30) -> Dict[str, Any]:
 
 
 def http_bytes(url: str, *, timeout: int = 30) -> bytes:
+    requests = _requests()
     if requests is not None:
         r = requests.get(url, timeout=timeout)
         r.raise_for_status()
@@ -110,35 +130,9 @@ def http_bytes(url: str, *, timeout: int = 30) -> bytes:
         return resp.read()
 
 
-def parse_video_ids_from_json(path: Path) -> List[str]:
-    data = json.loads(path.read_text(encoding="utf-8"))
-    ids: List[str] = []
-    if isinstance(data, list):
-        for item in data:
-            if not isinstance(item, dict):
-                continue
-            vid = item.get("video_id") or item.get("vimeo_id") or item.get("id")
-            if vid is None:
-                # sometimes only embed_url is present
-                embed = item.get("embed_url") or item.get("embed") or ""
-                m = re.search(r"vimeo\.com/video/(\d+)", str(embed))
-                if m:
-                    vid = m.group(1)
-            if vid is None:
-                continue
-            ids.append(str(vid))
-    else:
-        raise ValueError("JSON input must be a list of objects.")
-
-    # unique while preserving order
-    seen = set()
-    out: List[str] = []
-    for v in ids:
-        if v in seen:
-            continue
-        seen.add(v)
-        out.append(v)
-    return out
+def parse_video_ids_from_json(path: Path, lib: Optional[Library] = None) -> List[str]:
+    lib = library_for(path, lib)
+    return [str(v) for v in unique_video_ids(lib.records(path.name))]
 
 
 def parse_video_ids_from_csv(path: Path) -> List[str]:
@@ -253,18 +247,19 @@ def score_candidate(c: Candidate) -> Tuple[float, Dict[str, Any]]:
     # Prefer large thumbs (but don't let size dominate)
     score += min(c.width / 500.0, 3.0)
 
-    if Image is None:
+    pil = _pil()
+    if pil is None:
         return score, meta
 
     try:
         raw = http_bytes(c.url)
-        img = Image.open(io.BytesIO(raw)).convert("RGB")  # type: ignore
+        img = pil.Image.open(io.BytesIO(raw)).convert("RGB")
     except Exception:
         return score, meta
 
     # brightness
     try:
-        stat = ImageStat.Stat(img.convert("L"))  # type: ignore
+        stat = pil.ImageStat.Stat(img.convert("L"))
         bright = float(stat.mean[0])
         meta["brightness"] = bright
         # prefer middle exposure
@@ -275,9 +270,9 @@ def score_candidate(c: Candidate) -> Tuple[float, Dict[str, Any]]:
     # sharpness heuristic: mean abs diff from a blurred version
     try:
         gray = img.convert("L")
-        blur = gray.filter(ImageFilter.GaussianBlur(radius=2))  # type: ignore
+        blur = gray.filter(pil.ImageFilter.GaussianBlur(radius=2))
         # compute avg absolute pixel difference using histogram (fast, no numpy)
-        diff = ImageChops.difference(gray, blur)  # type: ignore
+        diff = pil.ImageChops.difference(gray, blur)
         hist = diff.histogram()
         total = sum(hist)
         if total > 0:
@@ -288,6 +283,7 @@ def score_candidate(c: Candidate) -> Tuple[float, Dict[str, Any]]:
         pass
 
     # face detection (optional)
+    cv2 = _cv2()
     if cv2 is not None:
         try:
             import numpy as np  # type: ignore
@@ -308,12 +304,6 @@ def score_candidate(c: Candidate) -> Tuple[float, Dict[str, Any]]:
     return score, meta
 
 
-# Pillow helpers only imported when Pillow is available
-if Image is not None:
-    import io
-    from PIL import ImageChops  # type: ignore
-
-
 def pick_best(cands: List[Candidate], *, fast: bool = False) -> Tuple[Optional[Candidate], Dict[str, Any]]:
     """Pick best candidate. fast=True avoids downloading/scoring images."""
     if not cands:
@@ -325,7 +315,7 @@ def pick_best(cands: List[Candidate], *, fast: bool = False) -> Tuple[Optional[C
         pool = active or cands
         return sorted(pool, key=lambda c: (c.width, c.height), reverse=True)[0]
 
-    if fast or Image is None:
+    if fast or _pil() is None:
         c = fallback()
         return c, {"reason": "fast_or_no_pillow", "picked": {"w": c.width, "h": c.height, "active": c.active}}
 
@@ -348,26 +338,11 @@ def pick_best(cands: List[Candidate], *, fast: bool = False) -> Tuple[Optional[C
     return best, {"reason": "scored", "picked": best_meta}
 
 
-def load_existing_overrides(path: Path) -> Dict[str, str]:
-    if not path.exists():
-        return {}
-    try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-        if not isinstance(data, dict):
-            return {}
-        # remove meta block if present
-        out: Dict[str, str] = {}
-        for k, v in data.items():
-            if k == "_meta":
-                continue
-            if isinstance(v, str):
-                out[str(k)] = v
-        return out
-    except Exception:
-        return {}
+def load_existing_overrides(path: Path, lib: Optional[Library] = None) -> Dict[str, str]:
+    return library_for(path, lib).thumbnail_overrides(path.name)
 
 
-def write_overrides(path: Path, mapping: Dict[str, str]) -> None:
+def write_overrides(path: Path, mapping: Dict[str, str], lib: Optional[Library] = None) -> None:
     payload = {
         "_meta": {
             "schema": "hiit56.thumbnail_overrides.v1",
@@ -377,10 +352,10 @@ def write_overrides(path: Path, mapping: Dict[str, str]) -> None:
         },
         **{k: mapping[k] for k in sorted(mapping, key=lambda s: int(s) if s.isdigit() else s)},
     }
-    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    library_for(path, lib).write(path.name, payload)
 
 
-def main(argv: Sequence[str]) -> int:
+def main(argv: Sequence[str], lib: Optional[Library] = None) -> int:
     ap = argparse.ArgumentParser(description="Generate HIIT56 thumbnail_overrides.json from Vimeo API")
     ap.add_argument("--input", required=True, help="Input JSON list or CSV containing Vimeo IDs")
     ap.add_argument("--output", required=True, help="Path to write thumbnail_overrides.json")
@@ -405,7 +380,7 @@ def main(argv: Sequence[str]) -> int:
         return 2
 
     if input_path.suffix.lower() == ".json":
-        video_ids = parse_video_ids_from_json(input_path)
+        video_ids = parse_video_ids_from_json(input_path, lib)
     elif input_path.suffix.lower() == ".csv":
         video_ids = parse_video_ids_from_csv(input_path)
     else:
@@ -415,7 +390,7 @@ def main(argv: Sequence[str]) -> int:
     if args.limit and args.limit > 0:
         video_ids = video_ids[: args.limit]
 
-    existing = load_existing_overrides(output_path)
+    existing = load_existing_overrides(output_path, lib)
     out_map: Dict[str, str] = dict(existing)
 
     cache_dir = Path(args.cache_dir)
@@ -439,7 +414,7 @@ def main(argv: Sequence[str]) -> int:
         except Exception as ex:
             eprint(f"[{processed}/{len(video_ids)}] {vid}: ERROR {ex}")
 
-    write_overrides(output_path, out_map)
+    write_overrides(output_path, out_map, lib)
     eprint(f"Done. Processed={processed}, picked/updated={picked}, total_overrides={len(out_map)}")
     return 0
 
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""HIIT56 — local stand-in for the Stripe webhook handler, for offline webhook_replay runs.
+
+Why:
+- tools/webhook_replay.py needs `netlify dev` plus a Supabase stack to run
+  for real. QA exercises the replay itself (signing, retries, lag, the pass
+  flag) against this server instead.
+
+Behaviour (POST to any path):
+- Stripe-Signature is checked the way stripe.webhooks.constructEvent does:
+  `t=<unix>,v1=<hex HMAC-SHA256(secret, "<t>.<body>")>`, any v1 may match,
+  `t` within TOLERANCE_SEC of now. Anything else -> 400.
+- The first delivery of about `fail_rate` of the events (picked from a hash
+  of the event id, so a run is repeatable) -> 500, like a handler that hit a
+  transient database error. Any later attempt of that event succeeds.
+- Otherwise 200 `{"received":true}`.
+- `server.received` counts correctly signed deliveries per event id;
+  `server.statuses` counts responses per status code.
+
+Usage:
+  python tools/webhook_standin.py --secret whsec_replay --port 8888
+  python tools/webhook_replay.py --secret whsec_replay --url http://127.0.0.1:8888/ --subscriptions 50
+
+  from webhook_standin import start
+  server, base = start("whsec_replay")   # ephemeral port, serving in a daemon thread
+  ...
+  server.shutdown()
+
+Stdlib only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import json
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Sequence, Tuple
+
+
+# stripe-node's default tolerance for the signature timestamp
+TOLERANCE_SEC = 300
+
+
+def verify(secret: str, body: bytes, header: Optional[str], now: Optional[float] = None) -> bool:
+    """True if `header` is a valid Stripe-Signature for `body`."""
+    parts = [p.split("=", 1) for p in (header or "").split(",") if "=" in p]
+    stamps = [v for k, v in parts if k.strip() == "t"]
+    macs = [v.strip() for k, v in parts if k.strip() == "v1"]
+    if len(stamps) != 1 or not stamps[0].strip().isdigit() or not macs:
+        return False
+    ts = int(stamps[0])
+    if abs((time.time() if now is None else now) - ts) > TOLERANCE_SEC:
+        return False
+    want = hmac.new(secret.encode("utf-8"), f"{ts}.".encode("utf-8") + body, hashlib.sha256).hexdigest()
+    return any(hmac.compare_digest(want, mac) for mac in macs)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "hiit56-webhook-standin/1"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _reply(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        with self.server.lock:
+            self.server.statuses[status] += 1
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not verify(self.server.secret, body, self.headers.get("Stripe-Signature")):
+            self._reply(400, {"error": "signature verification failed"})
+            return
+        try:
+            event_id = str(json.loads(body)["id"])
+        except (ValueError, KeyError, TypeError):
+            self._reply(400, {"error": "not a Stripe event"})
+            return
+        with self.server.lock:
+            self.server.received[event_id] += 1
+            first = self.server.received[event_id] == 1
+        if first and zlib.crc32(event_id.encode("utf-8")) % 1000 < self.server.fail_rate * 1000:
+            self._reply(500, {"error": "transient failure (stand-in)"})
+            return
+        self._reply(200, {"received": True})
+
+
+def _server(secret: str, fail_rate: float, host: str, port: int) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.secret = secret
+    server.fail_rate = fail_rate
+    server.lock = threading.Lock()
+    server.received = Counter()
+    server.statuses = Counter()
+    return server
+
+
+def start(secret: str, fail_rate: float = 0.1, host: str = "127.0.0.1", port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve in a daemon thread. Returns the server (call `shutdown()`) and its base URL."""
+    server = _server(secret, fail_rate, host, port)
+    threading.Thread(target=server.serve_forever, name="webhook-standin", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Local stand-in for the Stripe webhook handler (offline webhook_replay)")
+    ap.add_argument("--secret", required=True, help="Signing secret the replay uses")
+    ap.add_argument("--fail-rate", type=float, default=0.1, help="Share of events whose first delivery gets a 500")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8888)
+    args = ap.parse_args(argv)
+
+    server = _server(args.secret, args.fail_rate, args.host, args.port)
+    print(f"Serving stand-in webhook handler on http://{args.host}:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())